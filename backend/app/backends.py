@@ -0,0 +1,265 @@
+import os
+import sys
+import time
+import logging
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Summarization backends. Each one turns text into a summary; the router
+# (app/routing.py) decides which to call per request from their live stats.
+SUMMARY_BACKENDS = [name.strip() for name in os.getenv("SUMMARY_BACKENDS", "groq,huggingface").split(",") if name.strip()]
+BACKEND_STATS_WINDOW = float(os.getenv("BACKEND_STATS_WINDOW", "300"))  # Seconds of history behind p95 and error rate
+BACKEND_STATS_MAX_SAMPLES = 500
+
+GROQ_COST_PER_1K_TOKENS = float(os.getenv("GROQ_COST_PER_1K_TOKENS", "0.0001"))  # USD
+
+# Hugging Face Inference API (or any endpoint that speaks its summarization format)
+HF_API_KEY = os.getenv("HF_API_KEY")
+HF_INFERENCE_URL = os.getenv("HF_INFERENCE_URL", "https://api-inference.huggingface.co/models/facebook/bart-large-cnn")
+HF_MAX_INPUT_TOKENS = int(os.getenv("HF_MAX_INPUT_TOKENS", "900"))  # bart-large-cnn reads at most 1024 tokens
+HF_TIMEOUT = float(os.getenv("HF_TIMEOUT", "30"))
+HF_COST_PER_1K_TOKENS = float(os.getenv("HF_COST_PER_1K_TOKENS", "0"))  # USD
+
+
+class BackendError(Exception):
+    """An inference endpoint answered with an error or an unexpected body"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def is_transient_error(error: Exception) -> bool:
+    """A backend failure worth retrying later: 408/429/5xx, timeouts and dropped connections"""
+    if isinstance(error, BackendError):
+        return error.status_code is not None and (error.status_code in (408, 429) or error.status_code >= 500)
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
+
+class BackendStats:
+    """Latencies and outcomes from the last BACKEND_STATS_WINDOW seconds"""
+
+    def __init__(self):
+        self._samples = deque(maxlen=BACKEND_STATS_MAX_SAMPLES)  # (monotonic time, seconds, ok)
+        self.calls = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def record(self, seconds: float, ok: bool):
+        self._samples.append((time.monotonic(), seconds, ok))
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+
+    def record_cancelled(self):
+        """A call abandoned before it finished: counted, but never a latency or outcome sample"""
+        self.cancelled += 1
+
+    def _recent(self):
+        cutoff = time.monotonic() - BACKEND_STATS_WINDOW
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return self._samples
+
+    @property
+    def samples(self) -> int:
+        return len(self._recent())
+
+    def p95(self) -> Optional[float]:
+        """95th percentile latency of successful calls, or None without data"""
+        latencies = sorted(seconds for _, seconds, ok in self._recent() if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def error_rate(self) -> float:
+        samples = self._recent()
+        if not samples:
+            return 0.0
+        return sum(1 for _, _, ok in samples if not ok) / len(samples)
+
+
+class SummarizerBackend:
+    """
+    A way to summarize text. Subclasses set the routing attributes and
+    implement summarize(); start()/stop() manage any connections.
+    """
+
+    name = "backend"
+    model = None  # Recorded with cached summaries
+    cost_per_1k_tokens = 0.0  # USD, input tokens
+    max_input_tokens: Optional[int] = None  # None: any length (e.g. chunked map-reduce)
+    fallback_only = False  # Never routed to; used when every other backend fails
+
+    def __init__(self):
+        self.stats = BackendStats()
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def available(self) -> bool:
+        return True
+
+    def accepts(self, tokens: int) -> bool:
+        return self.max_input_tokens is None or tokens <= self.max_input_tokens
+
+    def estimated_cost(self, tokens: int) -> float:
+        return self.cost_per_1k_tokens * tokens / 1000
+
+    async def summarize(self, text: str) -> str:
+        raise NotImplementedError
+
+
+class FunctionBackend(SummarizerBackend):
+    """Backend around an in-process coroutine, e.g. the Groq pipeline in main.py"""
+
+    def __init__(
+        self,
+        name: str,
+        summarize: Callable[[str], Awaitable[str]],
+        model: Optional[str] = None,
+        cost_per_1k_tokens: float = 0.0,
+        max_input_tokens: Optional[int] = None,
+        available: Optional[Callable[[], bool]] = None,
+        fallback_only: bool = False,
+    ):
+        super().__init__()
+        self.name = name
+        self.model = model
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.max_input_tokens = max_input_tokens
+        self.fallback_only = fallback_only
+        self._summarize = summarize
+        self._available = available
+
+    def available(self) -> bool:
+        return self._available is None or self._available()
+
+    async def summarize(self, text: str) -> str:
+        return await self._summarize(text)
+
+
+class HttpInferenceBackend(SummarizerBackend):
+    """
+    Hugging Face style inference endpoint: POST {"inputs": text} and read
+    [{"summary_text": ...}] (or "generated_text") back. Works with the hosted
+    Inference API and self-hosted endpoints serving a summarization model.
+    """
+
+    def __init__(self, name: str, url: str, api_key: Optional[str], max_input_tokens: Optional[int],
+                 cost_per_1k_tokens: float = 0.0, timeout: float = 30.0):
+        super().__init__()
+        self.name = name
+        self.url = url
+        self.model = url.rstrip("/").split("/models/")[-1]
+        self.api_key = api_key
+        self.max_input_tokens = max_input_tokens
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.timeout = timeout
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    async def start(self):
+        if self._client is None:
+            import httpx  # Only when this backend is configured
+
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout, connect=5.0))
+
+    async def stop(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def available(self) -> bool:
+        return self._client is not None
+
+    async def summarize(self, text: str) -> str:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        response = await self._client.post(
+            self.url,
+            headers=headers,
+            json={"inputs": text, "options": {"wait_for_model": True}},
+        )
+        if response.status_code >= 400:
+            raise BackendError(
+                f"{self.name} returned {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+            )
+        try:
+            data = response.json()
+            item = data[0] if isinstance(data, list) else data
+            summary = item.get("summary_text") or item.get("generated_text")
+        except Exception:
+            summary = None
+        if not summary:
+            raise BackendError(f"{self.name} returned no summary")
+        return summary.strip()
+
+
+class BackendRegistry:
+    """Configured backends by name, in SUMMARY_BACKENDS preference order"""
+
+    def __init__(self):
+        self._backends: Dict[str, SummarizerBackend] = {}
+
+    def register(self, backend: SummarizerBackend):
+        self._backends[backend.name] = backend
+
+    def get(self, name: str) -> Optional[SummarizerBackend]:
+        return self._backends.get(name)
+
+    def routable(self) -> List[SummarizerBackend]:
+        """Enabled, available backends the router may pick from"""
+        backends = [self._backends[name] for name in SUMMARY_BACKENDS if name in self._backends]
+        return [backend for backend in backends if not backend.fallback_only and backend.available()]
+
+    @property
+    def fallback(self) -> Optional[SummarizerBackend]:
+        return next((backend for backend in self._backends.values() if backend.fallback_only), None)
+
+    async def start(self):
+        for backend in self._backends.values():
+            await backend.start()
+
+    async def stop(self):
+        for backend in self._backends.values():
+            try:
+                await backend.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping {backend.name} backend: {str(e)}")
+
+    def stats(self):
+        return {
+            name: {
+                "enabled": name in SUMMARY_BACKENDS or backend.fallback_only,
+                "available": backend.available(),
+                "model": backend.model,
+                "calls": backend.stats.calls,
+                "errors": backend.stats.errors,
+                "cancelled": backend.stats.cancelled,
+                "recent_samples": backend.stats.samples,
+                "p95_seconds": backend.stats.p95(),
+                "error_rate": round(backend.stats.error_rate(), 3),
+            }
+            for name, backend in self._backends.items()
+        }
+
+
+def huggingface_backend() -> Optional[HttpInferenceBackend]:
+    """The inference endpoint backend, if an API key or a custom endpoint is configured"""
+    if not HF_API_KEY and "HF_INFERENCE_URL" not in os.environ:
+        return None
+    return HttpInferenceBackend(
+        "huggingface", HF_INFERENCE_URL, HF_API_KEY, HF_MAX_INPUT_TOKENS, HF_COST_PER_1K_TOKENS, HF_TIMEOUT,
+    )
+
+
+registry = BackendRegistry()
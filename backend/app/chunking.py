@@ -0,0 +1,163 @@
+import os
+import re
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+# Chunked (map-reduce) summarization settings
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "3000"))  # Input tokens per Groq call
+CHUNK_MAX_CONCURRENCY = int(os.getenv("CHUNK_MAX_CONCURRENCY", "4"))  # Chunk calls in flight per request
+CHUNK_MAX_REDUCE_DEPTH = int(os.getenv("CHUNK_MAX_REDUCE_DEPTH", "3"))
+CHARS_PER_TOKEN = 4  # Rough average for English text with Llama tokenizers
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting; no tokenizer round trip"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def needs_chunking(text: str, budget: Optional[int] = None) -> bool:
+    return estimate_tokens(text) > (budget or CHUNK_TOKEN_BUDGET)
+
+
+def _split_oversized(sentence: str, budget: int) -> List[str]:
+    """Hard-split a single sentence that is larger than the budget on word boundaries"""
+    max_chars = budget * CHARS_PER_TOKEN
+    pieces, current, length = [], [], 0
+    for word in sentence.split():
+        if current and length + len(word) + 1 > max_chars:
+            pieces.append(" ".join(current))
+            current, length = [], 0
+        current.append(word)
+        length += len(word) + 1
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def split_into_chunks(text: str, budget: Optional[int] = None) -> List[str]:
+    """
+    Split text into chunks that fit the token budget, breaking on paragraph
+    boundaries first and sentence boundaries second.
+    """
+    budget = budget or CHUNK_TOKEN_BUDGET
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n\n".join(current))
+        current, current_tokens = [], 0
+
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        paragraph_tokens = estimate_tokens(paragraph)
+        if paragraph_tokens <= budget:
+            if current_tokens + paragraph_tokens > budget:
+                flush()
+            current.append(paragraph)
+            current_tokens += paragraph_tokens
+            continue
+
+        # Paragraph is too large on its own: pack it sentence by sentence
+        flush()
+        sentences = []
+        for sentence in _SENTENCE_END.split(paragraph):
+            if estimate_tokens(sentence) > budget:
+                sentences.extend(_split_oversized(sentence, budget))
+            else:
+                sentences.append(sentence)
+
+        packed, packed_tokens = [], 0
+        for sentence in sentences:
+            sentence_tokens = estimate_tokens(sentence)
+            if packed and packed_tokens + sentence_tokens > budget:
+                chunks.append(" ".join(packed))
+                packed, packed_tokens = [], 0
+            packed.append(sentence)
+            packed_tokens += sentence_tokens
+        if packed:
+            chunks.append(" ".join(packed))
+
+    flush()
+    return chunks
+
+
+def _group_by_budget(summaries: List[str], budget: int) -> List[List[str]]:
+    """Pack partial summaries into groups that fit one reduce call (at least two per group)"""
+    groups, current, current_tokens = [], [], 0
+    for summary in summaries:
+        tokens = estimate_tokens(summary)
+        if len(current) >= 2 and current_tokens + tokens > budget:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(summary)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def _gather_bounded(coroutines, limit: int):
+    """Run coroutines with at most `limit` in flight; cancel the rest on the first failure"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    tasks = [asyncio.ensure_future(bounded(c)) for c in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def map_reduce(
+    text: str,
+    summarize_chunk: Callable[[str, int, int], Awaitable[str]],
+    reduce_summaries: Callable[[List[str]], Awaitable[str]],
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    budget: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> str:
+    """
+    Summarize a long document: summarize budget-sized chunks concurrently
+    (map), then combine the partial summaries (reduce), recursing while the
+    combined partials still exceed the budget.
+    """
+    budget = budget or CHUNK_TOKEN_BUDGET
+    concurrency = concurrency or CHUNK_MAX_CONCURRENCY
+
+    chunks = split_into_chunks(text, budget)
+    total = len(chunks)
+    completed = 0
+
+    async def map_one(index: int, chunk: str) -> str:
+        nonlocal completed
+        summary = await summarize_chunk(chunk, index, total)
+        completed += 1
+        if on_progress:
+            on_progress(completed, total)
+        return summary
+
+    summaries = await _gather_bounded([map_one(i, c) for i, c in enumerate(chunks)], concurrency)
+
+    depth = 0
+    while len(summaries) > 1 and estimate_tokens("\n\n".join(summaries)) > budget and depth < CHUNK_MAX_REDUCE_DEPTH:
+        groups = _group_by_budget(summaries, budget)
+        summaries = await _gather_bounded([reduce_summaries(g) for g in groups], concurrency)
+        depth += 1
+
+    if len(summaries) == 1:
+        return summaries[0]
+    return await reduce_summaries(summaries)
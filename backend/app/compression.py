@@ -0,0 +1,91 @@
+import os
+import zlib
+import logging
+
+from sqlalchemy.types import Text, TypeDecorator
+
+try:
+    import zstandard  # Optional; zlib is used without it
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Compressed note text. On SQLite original_text is stored as a BLOB whose
+# first byte says how the rest is encoded, so formats can change without
+# rewriting old rows. PostgreSQL already compresses large text values
+# (TOAST) and its search index needs plain text, so values pass through.
+NOTE_COMPRESSION = os.getenv("NOTE_COMPRESSION", "zlib").lower()  # zlib, zstd or none
+NOTE_COMPRESSION_LEVEL = int(os.getenv("NOTE_COMPRESSION_LEVEL", "6"))
+NOTE_COMPRESSION_MIN_BYTES = int(os.getenv("NOTE_COMPRESSION_MIN_BYTES", "256"))  # Smaller texts are stored raw
+
+# Format-version byte
+FORMAT_RAW = 0x00
+FORMAT_ZLIB = 0x01
+FORMAT_ZSTD = 0x02
+
+if NOTE_COMPRESSION == "zstd" and zstandard is None:
+    logger.warning("NOTE_COMPRESSION=zstd but zstandard is not installed; using zlib")
+    NOTE_COMPRESSION = "zlib"
+
+
+class UnknownFormat(ValueError):
+    """A stored value starts with a format byte this build can't read"""
+
+
+def compress_text(value: str) -> bytes:
+    data = value.encode("utf-8")
+    if NOTE_COMPRESSION == "none" or len(data) < NOTE_COMPRESSION_MIN_BYTES:
+        return bytes([FORMAT_RAW]) + data
+    if NOTE_COMPRESSION == "zstd":
+        compressed = bytes([FORMAT_ZSTD]) + zstandard.ZstdCompressor(level=NOTE_COMPRESSION_LEVEL).compress(data)
+    else:
+        compressed = bytes([FORMAT_ZLIB]) + zlib.compress(data, NOTE_COMPRESSION_LEVEL)
+    # Incompressible input: don't pay for decompression later
+    if len(compressed) >= len(data) + 1:
+        return bytes([FORMAT_RAW]) + data
+    return compressed
+
+
+def decompress_text(value):
+    """Decode a stored value; plain strings are rows written before compression"""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value:
+        return ""
+    fmt, payload = value[0], value[1:]
+    if fmt == FORMAT_RAW:
+        return payload.decode("utf-8")
+    if fmt == FORMAT_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if fmt == FORMAT_ZSTD:
+        if zstandard is None:
+            raise UnknownFormat("Note text is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    raise UnknownFormat(f"Unknown note text format byte {fmt:#04x}")
+
+
+def is_compressed(value) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview))
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column compressed on write and decompressed on load. SQLite only:
+    on PostgreSQL values pass through unchanged, so the table is no smaller
+    than plain Text. The column stays TEXT in the schema; SQLite keeps the
+    BLOBs as-is, so existing plain-text rows remain readable until they are
+    migrated.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "sqlite":
+            return value
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
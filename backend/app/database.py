@@ -1,14 +1,27 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, UniqueConstraint, text
+from sqlalchemy import create_engine, event, inspect, Column, Integer, String, Text, DateTime, UniqueConstraint, Index, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, deferred
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.exc import DBAPIError, OperationalError, InterfaceError, TimeoutError as PoolTimeoutError
 import datetime
 import os
+import time
 import uuid
+import random
+import asyncio
+import logging
+import threading
 from dotenv import load_dotenv
+from fastapi import Request
+from app import metrics
+from app.compression import CompressedText, decompress_text
+from app.sqlite_writer import GroupCommitWriter, execute_group
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Get database URL from environment variables or use default SQLite
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./notes.db")
 
@@ -18,13 +31,30 @@ if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
 
 # Debug environment
 DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
-print(f"Using database URL: {SQLALCHEMY_DATABASE_URL.split('@')[0] if '@' in SQLALCHEMY_DATABASE_URL else SQLALCHEMY_DATABASE_URL[:25]}...")
-print(f"Database type: {'PostgreSQL' if SQLALCHEMY_DATABASE_URL.startswith('postgresql://') else 'SQLite'}")
-print(f"Debug mode: {DEBUG}")
+logger.info(
+    "Database configured",
+    extra={
+        "database_type": "PostgreSQL" if SQLALCHEMY_DATABASE_URL.startswith("postgresql://") else "SQLite",
+        "debug": DEBUG,
+    }
+)
+
+# Session checkout retry and instrumentation settings
+DB_CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", "2"))
+DB_RETRY_BACKOFF = float(os.getenv("DB_RETRY_BACKOFF", "0.1"))  # Seconds, doubled per attempt
+DB_RETRY_MAX_BACKOFF = float(os.getenv("DB_RETRY_MAX_BACKOFF", "1.0"))
+DB_CHECKOUT_WAIT_THRESHOLD = float(os.getenv("DB_CHECKOUT_WAIT_THRESHOLD", "0.01"))  # Seconds
+DB_WRITE_RETRIES = int(os.getenv("DB_WRITE_RETRIES", "3"))  # Retries for lock/deadlock/serialization errors
+
+# SQLite performance mode: WAL journaling, relaxed fsync and a bigger page
+# cache, with writes funnelled through one group-committing connection
+SQLITE_PERFORMANCE_MODE = os.getenv("SQLITE_PERFORMANCE_MODE", "True").lower() in ("true", "1", "t")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # Page cache per connection
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # Bytes of the file memory-mapped
 
 # Configure database engine based on the database type
 if SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
-    print("Configuring PostgreSQL engine for production...")
+    logger.info("Configuring PostgreSQL engine for production")
     # PostgreSQL configuration for production
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
@@ -38,7 +68,7 @@ if SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
         }
     )
 else:
-    print("Configuring SQLite engine for development...")
+    logger.info("Configuring SQLite engine for development")
     # SQLite configuration for development
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL, 
@@ -56,6 +86,88 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers, so DB I/O shares the event loop with
+# Groq I/O instead of holding a threadpool thread. The sync engine above is
+# kept for schema creation, migrations and scripts.
+if SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
+    ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=5,
+        max_overflow=10,
+        echo=DEBUG,
+        connect_args={
+            "server_settings": {"timezone": "utc"}  # asyncpg equivalent of -c timezone=utc
+        }
+    )
+else:
+    ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": 30,
+            "isolation_level": "IMMEDIATE"
+        },
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_size=10,
+        max_overflow=5,
+        echo=DEBUG
+    )
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection pragmas for SQLite performance mode"""
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers run alongside the writer; NORMAL only fsyncs at
+        # checkpoints, which is still crash-safe in WAL mode
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    """SQL functions used by the search index and its triggers"""
+    # note_text(original_text) decodes compressed note text (app/compression.py)
+    dbapi_connection.create_function("note_text", 1, decompress_text, deterministic=True)
+
+if not SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
+    for _engine in (engine, async_engine.sync_engine):
+        event.listen(_engine, "connect", _register_sqlite_functions)
+
+# Reads go through async_engine's pool; all writes in this worker go through
+# one dedicated connection that group-commits (see app/sqlite_writer.py)
+async_write_engine = None
+sqlite_writer = None
+if not SQLALCHEMY_DATABASE_URL.startswith("postgresql://") and SQLITE_PERFORMANCE_MODE:
+    logger.info("Enabling SQLite performance mode (WAL, single writer)")
+    async_write_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": 30,               # Other workers' writers hold the lock briefly
+            "isolation_level": "IMMEDIATE"
+        },
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_size=1,           # The single writer
+        max_overflow=0,
+        echo=DEBUG
+    )
+    for _engine in (engine, async_engine.sync_engine, async_write_engine.sync_engine):
+        event.listen(_engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_write_engine.sync_engine, "connect", _register_sqlite_functions)
+
+    sqlite_writer = GroupCommitWriter(async_write_engine)
+
 Base = declarative_base()
 
 class Note(Base):
@@ -63,68 +175,317 @@ class Note(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     note_session_id = Column(String(36), nullable=False, unique=True, index=True)
-    original_text = Column(Text, nullable=False)
+    # Compressed on SQLite only (plain text on PostgreSQL), and only loaded
+    # when asked for (undefer it for the full note)
+    original_text = deferred(Column(CompressedText, nullable=False))
     summary = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))  # Optimistic concurrency
     
-    __table_args__ = (UniqueConstraint('note_session_id', name='uix_note_session_id'),)
+    __table_args__ = (
+        UniqueConstraint('note_session_id', name='uix_note_session_id'),
+        Index('ix_notes_created_at_id', 'created_at', 'id'),  # Keyset pagination for GET /notes
+    )
     
     def __repr__(self):
         return f"<Note(id={self.id}, note_session_id={self.note_session_id}, summary={self.summary[:30]}...)>"
 
-# Create tables with error handling
-try:
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully!")
-except Exception as e:
-    print(f"❌ Error creating database tables: {e}")
-    if "does not exist" in str(e):
-        print("💡 Make sure PostgreSQL database is created and accessible")
-    raise
+class SummaryCacheEntry(Base):
+    __tablename__ = "summary_cache"
+    
+    cache_key = Column(String(64), primary_key=True)  # SHA-256 of text + model settings
+    summary = Column(Text, nullable=False)
+    model = Column(String(100), nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<SummaryCacheEntry(cache_key={self.cache_key[:12]}..., model={self.model})>"
 
-def get_db():
+class SummaryJob(Base):
+    __tablename__ = "summary_jobs"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    status = Column(String(16), nullable=False, default="queued")  # queued, running, succeeded, failed
+    text = Column(Text, nullable=False)
+    summary = Column(Text, nullable=True)
+    fallback_reason = Column(Text, nullable=True)  # Set when the final summary came from the local fallback
+    note_session_id = Column(String(36), nullable=False, default=lambda: str(uuid.uuid4()))
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)  # Retry backoff
+    locked_by = Column(String(64), nullable=True)  # Worker holding the lease
+    locked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True, index=True)
+    
+    __table_args__ = (
+        Index('ix_summary_jobs_status_run_after', 'status', 'run_after'),  # Claim query
+    )
+    
+    def __repr__(self):
+        return f"<SummaryJob(id={self.id}, status={self.status}, attempts={self.attempts})>"
+
+# Migrations not yet applied, as of the last check_migrations(); readiness
+# fails while any are pending
+pending_migrations = []
+
+def check_migrations():
+    """Compare the applied migrations with the scripts in migrations/ and log any that are pending"""
+    global pending_migrations
+    from app import migrator
+    pending_migrations = migrator.pending(engine)
+    if pending_migrations:
+        logger.error(
+            f"Database schema is behind: migrations {', '.join(pending_migrations)} are not applied. "
+            "Run `python migrate.py`; until then this worker reports not ready"
+        )
+    return pending_migrations
+
+def init_db():
     """
-    Get database session with improved error handling for PostgreSQL
+    Create tables and the full-text search index if they don't exist. Called
+    from the app lifespan rather than at import, so importing this module
+    opens no connections. A new database is fully migrated here; changes to
+    existing tables are left to the versioned migrations (`python migrate.py`),
+    which batch their work, and are only checked for.
     """
-    db = SessionLocal()
+    notes_existed = inspect(engine).has_table(Note.__tablename__)
+    for attempt in range(2):
+        try:
+            Base.metadata.create_all(bind=engine)
+            logger.info("Database tables created")
+            break
+        except Exception as e:
+            # Another worker starting at the same moment created it first
+            if attempt == 0 and "already exists" in str(e):
+                continue
+            logger.error(f"Error creating database tables: {e}")
+            if "does not exist" in str(e):
+                logger.error("Make sure PostgreSQL database is created and accessible")
+            raise
+    
+    if not notes_existed:
+        # Nothing to backfill yet, so every migration is quick: record them
+        # all, including the search index (0005), as applied
+        from app import migrator
+        migrator.upgrade(engine)
+    check_migrations()
+    
+    # Full-text search index (FTS5 on SQLite, GIN on PostgreSQL). Indexing a
+    # table that already has rows can take minutes and block writes, so on an
+    # existing table it is left to migration 0005, which builds it online.
     try:
-        # Test connection before using it
-        if SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
-            # PostgreSQL-specific connection test
-            db.execute(text("SELECT version()"))
-        else:
-            # SQLite connection test
-            db.execute(text("SELECT 1"))
-        yield db
+        from app.search import enable_index_writes, search_index_ready
+        if not search_index_ready(engine):
+            logger.warning("Full-text search index missing or outdated; run `python migrate.py` to build it")
+        enable_index_writes(engine)
     except Exception as e:
-        print(f"Database connection error: {str(e)}")
-        db.rollback()  # Rollback any pending transaction
-        # If there's an error with the connection, close and retry
+        # Search is optional; the rest of the API works without it
+        logger.warning(f"Full-text search index unavailable: {e}")
+
+class PoolStats:
+    """Connection pool instrumentation, updated on every session checkout"""
+
+    def __init__(self, engine, name: str):
+        self.engine = engine
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+        self.checkout_waits = 0      # Checkouts slower than DB_CHECKOUT_WAIT_THRESHOLD
+        self.checkout_timeouts = 0   # Pool exhausted for pool_timeout seconds
+        self.connect_retries = 0
+        self.connect_failures = 0
+        self.max_overflow_in_use = 0
+
+    def record_checkout(self, seconds: float):
+        metrics.DB_POOL_CHECKOUT_SECONDS.labels(self.name).observe(seconds)
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds += seconds
+            self.max_checkout_seconds = max(self.max_checkout_seconds, seconds)
+            if seconds >= DB_CHECKOUT_WAIT_THRESHOLD:
+                self.checkout_waits += 1
+            overflow = getattr(self.engine.pool, "overflow", None)
+            if overflow is not None:
+                self.max_overflow_in_use = max(self.max_overflow_in_use, overflow())
+
+    def snapshot(self):
+        pool = self.engine.pool
+        status = {
+            "pool_class": type(pool).__name__,
+            "checkouts": self.checkouts,
+            "avg_checkout_ms": round(self.checkout_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_checkout_ms": round(self.max_checkout_seconds * 1000, 3),
+            "checkout_waits": self.checkout_waits,
+            "checkout_timeouts": self.checkout_timeouts,
+            "connect_retries": self.connect_retries,
+            "connect_failures": self.connect_failures,
+            "max_overflow_in_use": self.max_overflow_in_use,
+        }
+        # QueuePool exposes live occupancy; other pool classes don't
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            if callable(method):
+                status[name] = method()
+        return status
+
+pool_stats = PoolStats(engine, "sync")
+async_pool_stats = PoolStats(async_engine.sync_engine, "async")
+
+# Optional PostgreSQL read replicas for the read-only note endpoints
+from app.replicas import ReplicaRouter, DATABASE_REPLICA_URLS
+if DATABASE_REPLICA_URLS and not SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
+    logger.warning("DATABASE_REPLICA_URLS is only supported with PostgreSQL; reading from the primary")
+    replica_router = ReplicaRouter([])
+else:
+    replica_router = ReplicaRouter(DATABASE_REPLICA_URLS, DEBUG)
+    if replica_router.enabled:
+        logger.info(f"Routing reads to {len(DATABASE_REPLICA_URLS)} read replica(s)")
+
+def _retry_delay(attempt: int) -> float:
+    """Jittered exponential backoff for connection retries"""
+    delay = min(DB_RETRY_MAX_BACKOFF, DB_RETRY_BACKOFF * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+def _checkout_connection(db):
+    """
+    Check out the session's connection, retrying with bounded exponential
+    backoff when the database is unreachable. pool_pre_ping has already
+    discarded stale pooled connections by the time an error reaches us, so
+    anything raised here is a real connection failure.
+    """
+    for attempt in range(DB_CONNECT_RETRIES + 1):
+        started = time.perf_counter()
         try:
+            db.connection()
+            pool_stats.record_checkout(time.perf_counter() - started)
+            return
+        except PoolTimeoutError:
+            pool_stats.checkout_timeouts += 1
+            raise
+        except (OperationalError, InterfaceError) as e:
             db.close()
-        except:
-            pass  # Ignore errors on close
-            
-        # Create new session and try again
-        db = SessionLocal()
+            if attempt == DB_CONNECT_RETRIES:
+                pool_stats.connect_failures += 1
+                logger.error(f"Database connection failed after {attempt + 1} attempts: {str(e)}")
+                raise
+            pool_stats.connect_retries += 1
+            time.sleep(_retry_delay(attempt))  # Dependency runs in the threadpool, not the event loop
+
+def get_db():
+    """
+    Get a database session for one request. Liveness is handled by
+    pool_pre_ping at checkout, so no probe query is sent.
+    """
+    db = SessionLocal()
+    try:
+        _checkout_connection(db)
+        yield db
+    finally:
+        db.close()
+
+async def _checkout_async(db, stats):
+    """Async counterpart of _checkout_connection"""
+    for attempt in range(DB_CONNECT_RETRIES + 1):
+        started = time.perf_counter()
         try:
-            if SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
-                db.execute(text("SELECT 1"))  # Simpler test for retry
-            else:
-                db.execute(text("SELECT 1"))
-            yield db
-        except Exception as retry_error:
-            print(f"Database retry failed: {retry_error}")
+            await db.connection()
+            stats.record_checkout(time.perf_counter() - started)
+            return
+        except PoolTimeoutError:
+            stats.checkout_timeouts += 1
             raise
+        except (OperationalError, InterfaceError) as e:
+            await db.close()
+            if attempt == DB_CONNECT_RETRIES:
+                stats.connect_failures += 1
+                logger.error(f"Database connection failed after {attempt + 1} attempts: {str(e)}")
+                raise
+            stats.connect_retries += 1
+            await asyncio.sleep(_retry_delay(attempt))
+
+async def get_async_db():
+    """
+    Async counterpart of get_db for async handlers: same pre-ping liveness,
+    bounded retry on real connection errors, and checkout instrumentation
+    """
+    db = AsyncSessionLocal()
+    try:
+        await _checkout_async(db, async_pool_stats)
+        yield db
     finally:
-        # Always ensure connection is properly closed
+        await db.close()
+
+async def get_async_read_db(request: Request):
+    """
+    Session for read-only handlers. With DATABASE_REPLICA_URLS set this is a
+    replica session (round-robin over healthy replicas); notes written in the
+    last REPLICA_STICKY_SECONDS are read from the primary so a client always
+    sees its own update. session.info["replica"] names the replica, if any.
+    """
+    replica = replica_router.pick(request.path_params.get("note_session_id"))
+    if replica is not None:
+        db = replica.sessionmaker()
         try:
-            db.close()
-        except Exception as e:
-            print(f"Error closing database connection: {str(e)}")
-            pass
+            await db.connection()
+        except (OperationalError, InterfaceError, OSError) as e:
+            # Don't retry a broken replica; take it out of rotation and use the primary
+            await db.close()
+            replica.healthy = False
+            replica.failures += 1
+            replica.last_error = str(e)
+            logger.warning(f"Replica {replica.name} unavailable, reading from primary: {str(e)}")
+        else:
+            db.info["replica"] = replica.name
+            try:
+                yield db
+            finally:
+                await db.close()
+            return
+
+    db = AsyncSessionLocal()
+    try:
+        await _checkout_async(db, async_pool_stats)
+        yield db
+    finally:
+        await db.close()
+
+def is_transient_write_error(error: Exception) -> bool:
+    """Lock contention, deadlocks and serialization failures are worth retrying"""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    message = str(error).lower()
+    return isinstance(error, OperationalError) and any(
+        marker in message for marker in ("database is locked", "deadlock", "could not serialize", "busy")
+    )
+
+async def execute_write(db, statement, before=(), after=()):
+    """
+    Execute a single write statement and commit (through the SQLite group
+    commit writer when it is running), retrying transient errors
+    with jittered exponential backoff on the event loop (never sleeping a
+    worker thread). Statements in `before` and `after` run around it in the
+    same transaction. Returns the first RETURNING row, or None.
+    """
+    statements = (*before, statement, *after)
+    for attempt in range(DB_WRITE_RETRIES + 1):
+        try:
+            if sqlite_writer is not None and sqlite_writer.running:
+                return await sqlite_writer.submit(statements)
+            row = await execute_group(db, statements)
+            await db.commit()
+            return row
+        except DBAPIError as e:
+            await db.rollback()
+            if attempt == DB_WRITE_RETRIES or not is_transient_write_error(e):
+                raise
+            logger.warning(f"Transient database write error, retrying: {str(e)}")
+            await asyncio.sleep(_retry_delay(attempt))
 
 def test_database_connection():
     """
@@ -135,12 +496,12 @@ def test_database_connection():
         if SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
             result = db.execute(text("SELECT version()"))
             version = result.fetchone()[0]
-            print(f"✅ PostgreSQL connection successful: {version.split(',')[0]}")
+            logger.info(f"PostgreSQL connection successful: {version.split(',')[0]}")
         else:
             db.execute(text("SELECT 1"))
-            print("✅ SQLite connection successful")
+            logger.info("SQLite connection successful")
         db.close()
         return True
     except Exception as e:
-        print(f"❌ Database connection test failed: {e}")
+        logger.error(f"Database connection test failed: {e}")
         return False
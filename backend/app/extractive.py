@@ -0,0 +1,133 @@
+import re
+from typing import List
+
+import numpy as np
+
+# Extractive (offline) summarization settings
+EXTRACTIVE_RATIO = 0.2  # Fraction of sentences kept for long inputs
+EXTRACTIVE_MIN_SENTENCES = 3
+EXTRACTIVE_MAX_SENTENCES = 7
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_MAX_ITERATIONS = 50
+TEXTRANK_TOLERANCE = 1e-6
+TEXTRANK_MAX_SENTENCES = 1000  # Larger inputs use centroid scoring instead of the O(n^2) graph
+TEXTRANK_MAX_TERMS = 256  # Most widely shared terms used to build the similarity graph
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z0-9][a-z0-9']*")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own same she should
+so some such than that the their theirs them themselves then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you
+your yours yourself yourselves also may might must shall us
+""".split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on terminal punctuation and line breaks"""
+    return [s.strip() for s in _SENTENCE_BOUNDARY.split(text) if s and len(s.strip()) > 1]
+
+
+def _tfidf_triplets(sentences: List[str]):
+    """
+    Sparse TF-IDF as (row, col, weight) arrays with L2-normalized rows.
+    Returns (rows, cols, weights, n_terms).
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for row, sentence in enumerate(sentences):
+        for word in _WORD.findall(sentence.lower()):
+            if word in STOPWORDS:
+                continue
+            rows.append(row)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    n_sentences, n_terms = len(sentences), max(1, len(vocabulary))
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32), n_terms
+
+    # Collapse repeated (row, col) pairs into term counts
+    flat = np.asarray(rows, dtype=np.int64) * n_terms + np.asarray(cols, dtype=np.int64)
+    positions, counts = np.unique(flat, return_counts=True)
+    rows, cols = positions // n_terms, positions % n_terms
+
+    document_frequency = np.bincount(cols, minlength=n_terms)
+    idf = np.log((1.0 + n_sentences) / (1.0 + document_frequency)) + 1.0
+    weights = (np.log1p(counts) * idf[cols]).astype(np.float32)
+
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n_sentences)).astype(np.float32)
+    norms[norms == 0] = 1.0
+    return rows, cols, weights / norms[rows], n_terms
+
+
+def centroid_scores(sentences: List[str]) -> np.ndarray:
+    """Similarity of each sentence to the document's TF-IDF centroid; O(non-zeros)"""
+    rows, cols, weights, n_terms = _tfidf_triplets(sentences)
+    centroid = np.bincount(cols, weights=weights, minlength=n_terms)
+    return np.bincount(rows, weights=weights * centroid[cols], minlength=len(sentences))
+
+
+def textrank_scores(sentences: List[str]) -> np.ndarray:
+    """PageRank over the cosine-similarity sentence graph"""
+    n = len(sentences)
+    rows, cols, weights, n_terms = _tfidf_triplets(sentences)
+
+    # Terms found in a single sentence never link two sentences, so the dense
+    # matrix only needs shared terms, and of those only the most widely shared
+    # carry enough graph weight to matter
+    document_frequency = np.bincount(cols, minlength=n_terms)
+    shared = np.flatnonzero(document_frequency > 1)
+    if len(shared) > TEXTRANK_MAX_TERMS:
+        shared = shared[np.argpartition(-document_frequency[shared], TEXTRANK_MAX_TERMS - 1)[:TEXTRANK_MAX_TERMS]]
+    column_of = np.full(n_terms, -1, dtype=np.int64)
+    column_of[shared] = np.arange(len(shared))
+    mask = column_of[cols] >= 0
+    matrix = np.zeros((n, max(1, len(shared))), dtype=np.float32)
+    matrix[rows[mask], column_of[cols[mask]]] = weights[mask]
+
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+
+    # Row-normalize into a transition matrix; isolated sentences jump uniformly
+    out_degree = similarity.sum(axis=1)
+    isolated = out_degree == 0
+    out_degree[isolated] = 1.0
+    similarity /= out_degree[:, None]
+    similarity[isolated] = 1.0 / n
+    transition = np.ascontiguousarray(similarity.T)
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    teleport = (1.0 - TEXTRANK_DAMPING) / n
+    for _ in range(TEXTRANK_MAX_ITERATIONS):
+        updated = teleport + TEXTRANK_DAMPING * (transition @ scores)
+        if np.abs(updated - scores).sum() < TEXTRANK_TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def select_sentences(sentences: List[str], k: int = None) -> List[str]:
+    """Pick the k highest-ranked sentences, returned in their original order"""
+    n = len(sentences)
+    if k is None:
+        k = int(round(n * EXTRACTIVE_RATIO))
+        k = max(EXTRACTIVE_MIN_SENTENCES, min(EXTRACTIVE_MAX_SENTENCES, k))
+    if n <= k:
+        return list(sentences)
+
+    if n <= TEXTRANK_MAX_SENTENCES:
+        scores = textrank_scores(sentences)
+    else:
+        scores = centroid_scores(sentences)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return [sentences[i] for i in np.sort(top)]
+
+
+def summarize(text: str, k: int = None) -> List[str]:
+    """Extractive summary of `text` as a list of sentences"""
+    return select_sentences(split_sentences(text), k)
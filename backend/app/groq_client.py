@@ -0,0 +1,139 @@
+import os
+import sys
+import random
+import asyncio
+import logging
+import importlib
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import groq
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# The Groq SDK (and the httpx stack under it) takes a few hundred ms to
+# import. It is loaded in startup(), not at import time, and the app starts
+# it in the background so workers answer requests before it is ready.
+
+# Connection pool configuration for the shared Groq client
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "100"))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "20"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "30"))
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+# Retries happen in the app (main.create_completion), not the SDK, so each
+# one goes through the shared rate limiter and honours a 429's retry-after
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "2"))
+GROQ_RETRY_BACKOFF = float(os.getenv("GROQ_RETRY_BACKOFF", "0.5"))  # Seconds, doubled per attempt
+GROQ_RETRY_MAX_BACKOFF = float(os.getenv("GROQ_RETRY_MAX_BACKOFF", "8"))
+
+_http_client: Optional["httpx.AsyncClient"] = None
+_client: Optional["groq.AsyncGroq"] = None
+_warmup: Optional[asyncio.Task] = None
+
+
+async def startup(api_key: Optional[str]):
+    """
+    Create the long-lived async Groq client and its pooled HTTP transport.
+    Called once per worker process from the app lifespan.
+    """
+    global _http_client, _client
+
+    if _client is not None or not api_key:
+        return
+
+    import httpx
+    import groq
+
+    _http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(GROQ_TIMEOUT, connect=GROQ_CONNECT_TIMEOUT),
+    )
+    _client = groq.AsyncGroq(
+        api_key=api_key,
+        http_client=_http_client,
+        max_retries=0,
+    )
+    logger.info(
+        f"Groq client ready (max_connections={GROQ_MAX_CONNECTIONS}, "
+        f"keepalive={GROQ_MAX_KEEPALIVE_CONNECTIONS})"
+    )
+
+
+def start_in_background(api_key: Optional[str]):
+    """Begin startup() without holding up the app; get_client() waits for it"""
+    global _warmup
+
+    if _client is None and api_key and _warmup is None:
+        _warmup = asyncio.create_task(_warm_up(api_key))
+
+
+async def _warm_up(api_key: str):
+    # Import on a thread so the event loop keeps serving meanwhile
+    await asyncio.to_thread(importlib.import_module, "groq")
+    await startup(api_key)
+
+
+async def shutdown():
+    """Close pooled connections so the worker exits cleanly"""
+    global _http_client, _client, _warmup
+
+    if _warmup is not None:
+        _warmup.cancel()
+        try:
+            await _warmup
+        except BaseException:
+            pass
+        _warmup = None
+    _client = None
+    if _http_client is not None:
+        try:
+            await _http_client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing Groq HTTP client: {str(e)}")
+        _http_client = None
+
+
+async def get_client() -> "groq.AsyncGroq":
+    """Return the shared Groq client, raising if it was never initialized"""
+    if _client is None and _warmup is not None:
+        # Still starting up in the background
+        await asyncio.shield(_warmup)
+    if _client is None:
+        raise Exception("No Groq API key configured")
+    return _client
+
+
+def _sdk():
+    """The groq module if it has been imported; errors can't come from it otherwise"""
+    return sys.modules.get("groq")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    sdk = _sdk()
+    return sdk is not None and isinstance(error, sdk.RateLimitError)
+
+
+def is_api_error(error: Exception) -> bool:
+    sdk = _sdk()
+    return sdk is not None and isinstance(error, sdk.APIError)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """429s, 5xx, timeouts and dropped connections"""
+    sdk = _sdk()
+    if sdk is None:
+        return False
+    if isinstance(error, (sdk.RateLimitError, sdk.InternalServerError, sdk.APIConnectionError)):
+        return True
+    return isinstance(error, sdk.APIStatusError) and error.status_code in (408, 409)
+
+
+def retry_delay(attempt: int) -> float:
+    """Jittered exponential backoff before retry number `attempt`"""
+    return min(GROQ_RETRY_MAX_BACKOFF, GROQ_RETRY_BACKOFF * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
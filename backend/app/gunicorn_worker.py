@@ -0,0 +1,20 @@
+import os
+
+from uvicorn.workers import UvicornWorker
+
+# Seconds of gunicorn's graceful timeout kept for the app's own shutdown
+GUNICORN_SHUTDOWN_RESERVE = int(os.getenv("GUNICORN_SHUTDOWN_RESERVE", "10"))
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker for gunicorn_conf.py. On SIGTERM it stops accepting and
+    waits for open requests, but only until GUNICORN_SHUTDOWN_RESERVE
+    seconds before gunicorn's graceful timeout, so the lifespan shutdown
+    (job drain, queued SQLite writes, pools) still finishes before the
+    master kills the worker.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - GUNICORN_SHUTDOWN_RESERVE)
@@ -0,0 +1,130 @@
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+
+from app import database
+
+# Tiered health checks:
+#   liveness  - is the process serving requests (no I/O)
+#   readiness - can it take traffic right now (pool state, cached probe result; no I/O)
+#   deep      - database version and approximate note count, refreshed in the
+#               background so probes never wait on the database
+HEALTH_DEEP_CHECK_INTERVAL = float(os.getenv("HEALTH_DEEP_CHECK_INTERVAL", "30"))  # Seconds
+HEALTH_DEEP_CHECK_TIMEOUT = float(os.getenv("HEALTH_DEEP_CHECK_TIMEOUT", "5"))  # Seconds
+HEALTH_MAX_STALENESS = float(os.getenv("HEALTH_MAX_STALENESS", "120"))  # Older deep results don't count
+
+# Planner estimate instead of COUNT(*): reltuples is -1 until the table is
+# first vacuumed/analyzed, so fall back to the stats collector's live tuples
+PG_APPROXIMATE_COUNT = text("""
+    SELECT COALESCE(NULLIF(c.reltuples, -1), s.n_live_tup, 0)::bigint
+    FROM pg_class c
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE c.oid = 'notes'::regclass
+""")
+# Notes are never deleted through the API, so the highest rowid is a close
+# estimate, read from the end of the primary key b-tree
+SQLITE_APPROXIMATE_COUNT = text("SELECT COALESCE(MAX(rowid), 0) FROM notes")
+
+
+def pool_saturated(engine) -> bool:
+    """True when every pooled and overflow connection is checked out"""
+    pool = engine.pool
+    checkedout = getattr(pool, "checkedout", None)
+    size = getattr(pool, "size", None)
+    if not callable(checkedout) or not callable(size):
+        return False
+    return checkedout() >= size() + max(0, getattr(pool, "_max_overflow", 0))
+
+
+class HealthMonitor:
+    """Runs the deep check in the background and serves its last result"""
+
+    def __init__(self):
+        self.deep = None  # Last deep check result
+        self.deep_checked_at: Optional[float] = None  # time.monotonic() of the last refresh
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is not None:
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(HEALTH_DEEP_CHECK_INTERVAL)
+            await self.refresh()
+
+    async def refresh(self):
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self._probe(), HEALTH_DEEP_CHECK_TIMEOUT)
+            result["status"] = "connected"
+        except Exception as e:
+            result = {"status": "disconnected", "error": str(e)}
+        if database.pending_migrations:
+            # Picks up `python migrate.py` run while this worker is up
+            try:
+                await asyncio.to_thread(database.check_migrations)
+            except Exception as e:
+                result.setdefault("error", f"migration check failed: {e}")
+        result["check_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result["checked_at"] = datetime.now().isoformat()
+        self.deep = result
+        self.deep_checked_at = time.monotonic()
+
+    async def _probe(self):
+        is_postgresql = database.async_engine.dialect.name == "postgresql"
+        async with database.async_engine.connect() as conn:
+            if is_postgresql:
+                info = (await conn.execute(text("SELECT version()"))).scalar().split(",")[0]
+            else:
+                info = f"SQLite {(await conn.execute(text('SELECT sqlite_version()'))).scalar()}"
+
+        # The count is read-only, so it can come from a replica
+        count_query = PG_APPROXIMATE_COUNT if is_postgresql else SQLITE_APPROXIMATE_COUNT
+        replica = database.replica_router.pick()
+        source = replica.name if replica is not None else "primary"
+        engine = replica.engine if replica is not None else database.async_engine
+        async with engine.connect() as conn:
+            approximate_notes = (await conn.execute(count_query)).scalar()
+
+        return {
+            "type": "PostgreSQL" if is_postgresql else "SQLite",
+            "info": info,
+            "approximate_notes": int(approximate_notes or 0),
+            "count_source": source,
+        }
+
+    def deep_is_fresh(self) -> bool:
+        return self.deep_checked_at is not None and time.monotonic() - self.deep_checked_at <= HEALTH_MAX_STALENESS
+
+    def readiness(self):
+        """(ready, reasons) from in-memory state only"""
+        reasons = []
+        if pool_saturated(database.async_engine.sync_engine):
+            reasons.append("database pool exhausted")
+        if self.deep is not None and self.deep["status"] != "connected" and self.deep_is_fresh():
+            reasons.append(f"database unreachable: {self.deep.get('error')}")
+        if database.pending_migrations:
+            reasons.append(f"pending migrations: {', '.join(database.pending_migrations)}")
+        if database.sqlite_writer is not None and not database.sqlite_writer.running:
+            reasons.append("sqlite writer not running")
+        return not reasons, reasons
+
+
+monitor = HealthMonitor()
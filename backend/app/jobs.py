@@ -0,0 +1,256 @@
+import os
+import socket
+import random
+import asyncio
+import logging
+import datetime
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+
+from app import metrics
+from app.database import AsyncSessionLocal, SummaryJob, async_engine, execute_write
+
+logger = logging.getLogger(__name__)
+
+# Background summarization jobs. Jobs live in the summary_jobs table, so any
+# worker process can pick up a job another one accepted, and queued work
+# survives restarts.
+JOB_WORKERS_ENABLED = os.getenv("JOB_WORKERS_ENABLED", "True").lower() in ("true", "1", "t")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Concurrent jobs per server process
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))  # Seconds between polls when idle
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "5"))  # Seconds before the first retry, doubled per attempt
+JOB_RETRY_MAX_BACKOFF = float(os.getenv("JOB_RETRY_MAX_BACKOFF", "300"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))  # Running jobs older than this are reclaimed
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))  # Finished jobs kept this long
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "30"))  # Seconds to let running jobs finish
+JOB_PRUNE_INTERVAL = 3600.0
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+# Returns (summary, fallback_reason, retryable); fallback_reason is None for a
+# real model summary, and retryable says whether the failure behind a fallback
+# was transient (rate limit, timeout, 5xx) rather than e.g. no backend configured
+JobHandler = Callable[[str], Awaitable[Tuple[str, Optional[str], bool]]]
+
+
+def retry_delay(attempts: int) -> float:
+    """Jittered exponential backoff before the next attempt"""
+    delay = min(JOB_RETRY_MAX_BACKOFF, JOB_RETRY_BACKOFF * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+class JobWorkerPool:
+    """
+    Per-process pool of asyncio workers draining summary_jobs. A job is
+    claimed with a single UPDATE ... RETURNING; on PostgreSQL the candidate
+    row is picked with FOR UPDATE SKIP LOCKED so workers never queue behind
+    each other's claims, and on SQLite the writer lock serializes claims.
+    """
+
+    def __init__(self):
+        self.handler: Optional[JobHandler] = None
+        self._tasks = []
+        self._running_jobs = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._stopping = False
+        self._last_prune = 0.0
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def start(self, handler: JobHandler):
+        self.handler = handler
+        if not JOB_WORKERS_ENABLED or self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(f"{self.worker_prefix}:{n}")) for n in range(JOB_WORKERS)]
+        logger.info(f"Started {JOB_WORKERS} summary job workers")
+
+    async def stop(self):
+        """Stop claiming new jobs and give running ones a chance to finish"""
+        if not self._tasks:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        done, pending = await asyncio.wait(self._tasks, timeout=JOB_SHUTDOWN_TIMEOUT)
+        for task in pending:
+            # Unfinished jobs keep their lease and are reclaimed after JOB_LEASE_SECONDS
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, text: str) -> str:
+        job_id = str(uuid.uuid4())
+        async with AsyncSessionLocal() as db:
+            await execute_write(db, insert(SummaryJob).values(
+                id=job_id,
+                status="queued",
+                text=text,
+                note_session_id=str(uuid.uuid4()),
+                attempts=0,
+                run_after=utcnow(),
+                created_at=utcnow(),
+                updated_at=utcnow(),
+            ).returning(SummaryJob.id))
+        if self._wakeup is not None:
+            self._wakeup.set()  # Start it here rather than waiting for the next poll
+        return job_id
+
+    async def wait_for(self, job_id: str, timeout: float):
+        """Wait until this process finishes the job, or the timeout passes (the job may run elsewhere)"""
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            if self._finished.get(job_id) is event:
+                del self._finished[job_id]
+
+    def _claim_statement(self, worker_id: str):
+        now = utcnow()
+        candidate = (
+            select(SummaryJob.id)
+            .where(or_(
+                and_(SummaryJob.status == "queued", SummaryJob.run_after <= now),
+                # Lease expired: the worker that held it died mid-job
+                and_(SummaryJob.status == "running", SummaryJob.locked_at < now - datetime.timedelta(seconds=JOB_LEASE_SECONDS)),
+            ))
+            .order_by(SummaryJob.run_after)
+            .limit(1)
+        )
+        if async_engine.dialect.name == "postgresql":
+            candidate = candidate.with_for_update(skip_locked=True)
+        return (
+            update(SummaryJob)
+            .where(SummaryJob.id == candidate.scalar_subquery())
+            .values(status="running", locked_by=worker_id, locked_at=now, attempts=SummaryJob.attempts + 1)
+            .returning(SummaryJob.id, SummaryJob.text, SummaryJob.attempts)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _claim(self, worker_id: str):
+        async with AsyncSessionLocal() as db:
+            return await execute_write(db, self._claim_statement(worker_id))
+
+    async def _finish(self, worker_id: str, job_id: str, values: dict):
+        """Record the outcome, provided we still hold the lease"""
+        values = {**values, "updated_at": utcnow()}
+        statement = (
+            update(SummaryJob)
+            .where(SummaryJob.id == job_id, SummaryJob.locked_by == worker_id, SummaryJob.status == "running")
+            .values(**values)
+            .returning(SummaryJob.id)
+            .execution_options(synchronize_session=False)
+        )
+        async with AsyncSessionLocal() as db:
+            return await execute_write(db, statement)
+
+    async def _worker(self, worker_id: str):
+        while not self._stopping:
+            try:
+                job = await self._claim(worker_id)
+            except Exception as e:
+                logger.warning(f"Could not claim summary job: {str(e)}")
+                job = None
+
+            if job is None:
+                await self._maybe_prune()
+                self._wakeup.clear()
+                try:
+                    # Poll with jitter so idle workers across processes don't stampede
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL * random.uniform(0.75, 1.25))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._running_jobs.add(job.id)
+            try:
+                await self._run(worker_id, job)
+            finally:
+                self._running_jobs.discard(job.id)
+                event = self._finished.pop(job.id, None)
+                if event is not None:
+                    event.set()
+
+    async def _run(self, worker_id: str, job):
+        final_attempt = job.attempts >= JOB_MAX_ATTEMPTS
+        try:
+            summary, fallback_reason, retryable = await self.handler(job.text)
+        except Exception as e:
+            logger.warning(f"Summary job {job.id} attempt {job.attempts} failed: {str(e)}")
+            if final_attempt:
+                outcome = "failed"
+                values = {"status": "failed", "last_error": str(e), "finished_at": utcnow(), "locked_by": None}
+            else:
+                outcome = "retried"
+                values = self._retry_values(job.attempts, str(e))
+        else:
+            if fallback_reason is not None and retryable and not final_attempt:
+                # The backends were briefly unavailable; try again later for a real model summary
+                outcome = "retried"
+                values = self._retry_values(job.attempts, fallback_reason)
+            else:
+                outcome = "succeeded"
+                values = {
+                    "status": "succeeded",
+                    "summary": summary,
+                    "fallback_reason": fallback_reason,
+                    "finished_at": utcnow(),
+                    "locked_by": None,
+                }
+
+        try:
+            if await self._finish(worker_id, job.id, values) is None:
+                logger.warning(f"Lost the lease on summary job {job.id}; result discarded")
+                return
+        except Exception as e:
+            logger.error(f"Could not record result of summary job {job.id}: {str(e)}")
+            return
+
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        metrics.SUMMARY_JOBS.labels(outcome).inc()
+
+    def _retry_values(self, attempts: int, error: str) -> dict:
+        return {
+            "status": "queued",
+            "last_error": error,
+            "run_after": utcnow() + datetime.timedelta(seconds=retry_delay(attempts)),
+            "locked_by": None,
+            "locked_at": None,
+        }
+
+    async def _maybe_prune(self):
+        """Delete finished jobs past their retention, at most once an hour per process"""
+        loop_time = asyncio.get_running_loop().time()
+        if loop_time - self._last_prune < JOB_PRUNE_INTERVAL:
+            return
+        self._last_prune = loop_time
+        cutoff = utcnow() - datetime.timedelta(seconds=JOB_RETENTION_SECONDS)
+        statement = delete(SummaryJob).where(SummaryJob.finished_at < cutoff).execution_options(synchronize_session=False)
+        try:
+            async with AsyncSessionLocal() as db:
+                await execute_write(db, statement)
+        except Exception as e:
+            logger.warning(f"Could not prune old summary jobs: {str(e)}")
+
+    def stats(self):
+        return {
+            "enabled": JOB_WORKERS_ENABLED,
+            "workers": len(self._tasks),
+            "running": len(self._running_jobs),
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+pool = JobWorkerPool()
@@ -0,0 +1,230 @@
+import os
+import re
+import copy
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Structured logging. Request handlers only enqueue records; a background
+# listener thread formats them as JSON lines, redacts secrets and writes to
+# stdout, so a slow or contended stdout never stalls the event loop and
+# lines from different workers don't interleave mid-record.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # Per-logger overrides, e.g. "app.database=WARNING,sqlalchemy.engine=INFO"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json or text
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))  # Fraction of DEBUG records kept
+LOG_REDACT = os.getenv("LOG_REDACT", "True").lower() in ("true", "1", "t")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # Records beyond this are dropped, never blocking
+
+# Chatty third-party loggers; LOG_LEVELS overrides these
+DEFAULT_LOG_LEVELS = {"aiosqlite": "WARNING", "asyncio": "WARNING", "httpcore": "INFO"}
+
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Groq keys, URL credentials and bearer tokens
+_SECRET_PATTERNS = [
+    (re.compile(r"gsk_[A-Za-z0-9]*"), "gsk_[REDACTED]"),
+    (re.compile(r"(://[^:/@\s]+:)[^@\s]+@"), r"\1[REDACTED]@"),
+    (re.compile(r"(?i)(bearer\s+)[A-Za-z0-9._\-]+"), r"\1[REDACTED]"),
+]
+_SECRET_ENV_VARS = ("GROQ_API_KEY",)
+
+_listener = None
+
+
+def redact(message: str) -> str:
+    """Mask known secret values and anything shaped like a credential"""
+    for name in _SECRET_ENV_VARS:
+        value = os.getenv(name)
+        if value and len(value) >= 8:
+            message = message.replace(value, "[REDACTED]")
+    for pattern, replacement in _SECRET_PATTERNS:
+        message = pattern.sub(replacement, message)
+    return message
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp the current request ID on the record while still in the caller's context"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only a sample of DEBUG records so verbose hot-path lines stay cheap"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        """
+        Like QueueHandler.prepare, but the traceback is rendered into
+        exc_text instead of being appended to msg, so the formatter can
+        emit it as its own field. Live tracebacks never go on the queue.
+        """
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+_RESERVED_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "request_id", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line; extra= fields are included as top-level keys,
+    and a traceback or stack as `exc` / `stack`
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        line = json.dumps(entry, default=str, ensure_ascii=False)
+        return redact(line) if LOG_REDACT else line
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        line = super().format(record)
+        return redact(line) if LOG_REDACT else line
+
+
+def parse_levels(spec: str):
+    """Parse "logger=LEVEL,logger=LEVEL" into a dict"""
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """
+    Route the root logger through a queue to a background writer thread.
+    Safe to call twice. Call it in the serving process (the app's lifespan
+    does), not at import: a gunicorn master that preloads the app and then
+    forks would hand its workers a queue with no thread reading it.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(DebugSamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    for name, level in {**DEFAULT_LOG_LEVELS, **parse_levels(LOG_LEVELS)}.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware giving every request an ID: the caller's
+    X-Request-ID if present, otherwise a new one. It is stored in a context
+    variable for log records and echoed back in the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode("latin-1"):
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -1,26 +1,68 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ConfigDict
+from sqlalchemy import func, select, update, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+from typing import List, Optional
 from datetime import datetime
+from contextlib import asynccontextmanager
 import os
+import json
+import base64
+import time
 import uuid
+import asyncio
+import logging
 from dotenv import load_dotenv
-import groq
 
 # Load environment variables explicitly from the .env file
 dotenv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
-print(f"Loading .env from: {dotenv_path}")
 load_dotenv(dotenv_path=dotenv_path)
 
+# Structured, queued logging; the writer thread is started by the lifespan
+from app import logging_setup
+logger = logging.getLogger(__name__)
+logger.info(f"Loaded .env from: {dotenv_path}")
+
+# App modules read their settings from the environment at import time
+from app import groq_client
+from app import summary_cache
+from app import chunking
+from app import rate_limiter
+from app import search
+from app import health
+from app import metrics
+from app import database
+from app import jobs
+from app import singleflight
+from app import backends
+from app import routing
+from app.database import get_async_db, get_async_read_db, async_engine, AsyncSessionLocal, execute_write, Note, SummaryJob, pool_stats, async_pool_stats, replica_router
+
 # API Configuration - Groq API key
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-print(f"Loaded Groq API key: {GROQ_API_KEY[:5]}..." if GROQ_API_KEY else "No Groq API key found")
-
 if not GROQ_API_KEY:
-    print("Warning: Groq API key not found. Set GROQ_API_KEY in .env file.")
+    logger.warning("Groq API key not found. Set GROQ_API_KEY in .env file.")
 else:
-    print(f"Initializing Groq client with key starting with: {GROQ_API_KEY[:5]}...")
+    logger.info("Groq API key loaded")
+
+# Summarization settings (part of the summary cache key)
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama3-8b-8192")  # Using Llama 3 8B model by default
+GROQ_TEMPERATURE = 0.3  # Lower temperature for more consistent summaries
+GROQ_MAX_TOKENS = 1000  # Reasonable limit for summaries
+PROMPT_VERSION = "v1"  # Bump whenever the summarization prompt changes
+
+# Batch summarization limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Notes listing
+NOTES_PAGE_SIZE = int(os.getenv("NOTES_PAGE_SIZE", "20"))
+NOTES_MAX_PAGE_SIZE = int(os.getenv("NOTES_MAX_PAGE_SIZE", "100"))
+SUMMARY_PREVIEW_CHARS = int(os.getenv("SUMMARY_PREVIEW_CHARS", "200"))
 
 # Server Configuration
 HOST = os.getenv("HOST", "0.0.0.0")
@@ -31,54 +73,72 @@ DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
-# Build origins list
-origins = []
-
-# Add development origins
-if DEBUG:
-    dev_origins = [
-        "http://localhost:5173", 
-        "http://localhost:5174", 
-        "http://localhost:5175", 
-        "http://127.0.0.1:5173", 
-        "http://127.0.0.1:5174", 
-        "http://127.0.0.1:5175",
-        "http://localhost:3000"
-    ]
-    origins.extend(dev_origins)
-
-# Add production frontend URL
-if FRONTEND_URL and FRONTEND_URL not in origins:
-    origins.append(FRONTEND_URL)
-
-# Add configured origins
-if ALLOWED_ORIGINS != "*":
-    for origin in ALLOWED_ORIGINS.split(","):
-        origin = origin.strip()
-        if origin and origin not in origins:
-            origins.append(origin)
-
-# If no specific origins and not debug, allow all
-if not origins or ALLOWED_ORIGINS == "*":
-    origins = ["*"]
-
-print(f"CORS enabled for origins: {origins}")
-
-app = FastAPI(
-    title="AI-Powered Note Summarizer API", 
-    description="A FastAPI backend for AI-powered text summarization",
-    version="1.0.0",
-    debug=DEBUG
-)
-
-# Add CORS middleware to allow frontend to communicate with API
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def build_cors_origins() -> List[str]:
+    """Allowed CORS origins from DEBUG, FRONTEND_URL and ALLOWED_ORIGINS"""
+    origins = []
+    
+    # Add development origins
+    if DEBUG:
+        dev_origins = [
+            "http://localhost:5173", 
+            "http://localhost:5174", 
+            "http://localhost:5175", 
+            "http://127.0.0.1:5173", 
+            "http://127.0.0.1:5174", 
+            "http://127.0.0.1:5175",
+            "http://localhost:3000"
+        ]
+        origins.extend(dev_origins)
+    
+    # Add production frontend URL
+    if FRONTEND_URL and FRONTEND_URL not in origins:
+        origins.append(FRONTEND_URL)
+    
+    # Add configured origins
+    if ALLOWED_ORIGINS != "*":
+        for origin in ALLOWED_ORIGINS.split(","):
+            origin = origin.strip()
+            if origin and origin not in origins:
+                origins.append(origin)
+    
+    # If no specific origins and not debug, allow all
+    if not origins or ALLOWED_ORIGINS == "*":
+        origins = ["*"]
+    
+    return origins
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources once per worker and release them on shutdown"""
+    # First, so everything below logs through the queue. Each worker starts
+    # its own writer thread, after any fork
+    logging_setup.setup_logging()
+    # Schema creation is I/O, so it happens here rather than at import
+    await run_in_threadpool(database.init_db)
+    groq_client.start_in_background(GROQ_API_KEY)
+    register_backends()
+    await backends.registry.start()
+    if database.sqlite_writer is not None:
+        await database.sqlite_writer.start()
+    await replica_router.start()
+    await health.monitor.start()
+    await jobs.pool.start(generate_summary_result)
+    try:
+        yield
+    finally:
+        await jobs.pool.stop()
+        await singleflight.flights.stop()
+        await health.monitor.stop()
+        await replica_router.stop()
+        if database.sqlite_writer is not None:
+            await database.sqlite_writer.stop()
+            await database.async_write_engine.dispose()
+        await backends.registry.stop()
+        await groq_client.shutdown()
+        await async_engine.dispose()
+
+# Endpoints are collected here and mounted by create_app()
+router = APIRouter()
 
 # Pydantic models for request/response
 class SummarizeRequest(BaseModel):
@@ -88,7 +148,76 @@ class SummarizeResponse(BaseModel):
     summary: str
     note_session_id: str
 
-@app.get("/")
+class BatchSummarizeRequest(BaseModel):
+    texts: List[str]
+
+class BatchSummarizeItem(BaseModel):
+    index: int
+    status: str  # "ok", "fallback" or "error"
+    summary: Optional[str] = None
+    note_session_id: Optional[str] = None
+    detail: Optional[str] = None
+
+class BatchSummarizeResponse(BaseModel):
+    results: List[BatchSummarizeItem]
+
+class SaveNoteRequest(BaseModel):
+    note_session_id: str
+    original_text: str
+    summary: str
+
+class UpdateNoteRequest(BaseModel):
+    summary: str
+    version: Optional[int] = None  # Expected current version; omit to overwrite unconditionally
+
+class NoteResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    note_session_id: str
+    original_text: str
+    summary: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    version: int = 1
+
+class NotePreview(BaseModel):
+    id: int
+    note_session_id: str
+    summary_preview: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class NotesPage(BaseModel):
+    notes: List[NotePreview]
+    next_cursor: Optional[str] = None
+
+class NoteSearchResult(BaseModel):
+    id: int
+    note_session_id: str
+    snippet: str
+    rank: float
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class NoteSearchPage(BaseModel):
+    results: List[NoteSearchResult]
+    next_offset: Optional[int] = None
+
+class SummarizeJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: str
+    status: str  # queued, running, succeeded or failed
+    summary: Optional[str] = None
+    note_session_id: str
+    fallback_reason: Optional[str] = None
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+@router.get("/")
 def read_root():
     return {
         "message": "Welcome to the AI-Powered Note Summarizer API", 
@@ -97,11 +226,28 @@ def read_root():
         "description": "AI-powered text summarization service"
     }
 
-@app.get("/health")
-def health_check():
-    """Health check endpoint for monitoring"""
+@router.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving. No I/O."""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness_check():
+    """Readiness probe from connection pool state and the cached deep check. No I/O."""
+    ready, reasons = health.monitor.readiness()
+    body = {"status": "ready" if ready else "not_ready", "reasons": reasons}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+@router.get("/health")
+async def health_check():
+    """
+    Deep health check for monitoring. Database details come from the last
+    background refresh (approximate note count, never COUNT(*)), so this
+    endpoint does no database I/O itself.
+    """
+    deep = health.monitor.deep or {"status": "unknown"}
     return {
-        "status": "healthy",
+        "status": "healthy" if deep.get("status") != "disconnected" else "unhealthy",
         "timestamp": datetime.now().isoformat(),
         "version": "1.0.0",
         "environment": "production" if not DEBUG else "development",
@@ -109,99 +255,773 @@ def health_check():
             "summarization": True,
             "groq_configured": bool(GROQ_API_KEY),
             "fallback_enabled": True
-        }
+        },
+        "database": deep,
+        "cache": summary_cache.cache.stats(),
+        "rate_limit": rate_limiter.scheduler.stats(),
+        "database_pool": async_pool_stats.snapshot(),
+        "database_sync_pool": pool_stats.snapshot(),
+        "sqlite_writer": database.sqlite_writer.stats() if database.sqlite_writer is not None else None,
+        "read_replicas": replica_router.stats(),
+        "jobs": jobs.pool.stats(),
+        "singleflight": singleflight.flights.stats(),
+        "summary_backends": routing.router.stats()
     }
 
-@app.post("/summarize", response_model=SummarizeResponse)
-def summarize_text(request: SummarizeRequest):
+@router.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint, aggregated across all workers"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+def build_summarization_prompt(text: str) -> str:
+    """Prompt for summarizing a whole note in a single call"""
+    return f"""You are an AI assistant that summarizes text clearly and concisely.
+
+Text to summarize:
+{text}
+
+Please provide a summary of the above text that captures the main points. Keep the summary concise but comprehensive."""
+
+def build_chunk_prompt(text: str, index: int, total: int) -> str:
+    """Prompt for one section of a long document (map step)"""
+    return f"""You are an AI assistant that summarizes text clearly and concisely.
+
+The following is part {index + 1} of {total} of a longer document:
+{text}
+
+Please summarize the main points of this part. Keep names, figures and decisions; omit filler."""
+
+def build_reduce_prompt(summaries: List[str]) -> str:
+    """Prompt for combining section summaries into one (reduce step)"""
+    sections = "\n\n".join(f"Section {i + 1}:\n{s}" for i, s in enumerate(summaries))
+    return f"""You are an AI assistant that summarizes text clearly and concisely.
+
+Below are summaries of consecutive sections of one document:
+{sections}
+
+Please combine them into a single summary of the whole document that captures the main points. Keep the summary concise but comprehensive."""
+
+def estimate_request_tokens(prompt: str) -> int:
+    """Tokens a request may consume: the prompt plus the full completion allowance"""
+    return chunking.estimate_tokens(prompt) + GROQ_MAX_TOKENS
+
+def fallback_cause(error: Exception) -> str:
+    """Metric label for why a summary fell back to the extractive summarizer"""
+    if groq_client.is_rate_limit_error(error):
+        return "rate_limit"
+    if groq_client.is_api_error(error) or isinstance(error, backends.BackendError):
+        return "api_error"
+    return "other"
+
+def is_transient_error(error: Exception) -> bool:
+    """Rate limits, timeouts and 5xx: failures a later retry may not hit"""
+    return groq_client.is_retryable_error(error) or backends.is_transient_error(error)
+
+def describe_failure(backend_name: str, error: Exception) -> str:
+    """Human-readable fallback reason for one backend's failure"""
+    if groq_client.is_rate_limit_error(error):
+        return f"Groq API rate limit exceeded: {str(error)}"
+    if groq_client.is_api_error(error):
+        return f"Groq API error: {str(error)}"
+    if isinstance(error, backends.BackendError):
+        return str(error)
+    return f"Unexpected error with {backend_name} backend: {str(error)}"
+
+def observe_groq_call(operation: str, started: float, error: Optional[Exception] = None):
+    outcome = "ok" if error is None else fallback_cause(error)
+    metrics.GROQ_REQUEST_SECONDS.labels(operation, outcome).observe(time.perf_counter() - started)
+
+async def acquire_quota(prompt: str) -> int:
+    """Reserve rate-limit quota for one Groq call, recording how long we queued"""
+    started = time.perf_counter()
+    reserved = await rate_limiter.scheduler.acquire(estimate_request_tokens(prompt))
+    metrics.GROQ_QUEUE_SECONDS.observe(time.perf_counter() - started)
+    return reserved
+
+async def create_completion(prompt: str, operation: str, **options):
+    """
+    Send one prompt to Groq, retrying 429s, 5xx and timeouts up to
+    GROQ_MAX_RETRIES times. The SDK's own retries are off, so every attempt
+    queues for the shared quota, after any retry-after pause. Returns the
+    response, the tokens reserved and when the successful attempt started.
+    """
+    # Reuse the pooled client created at startup
+    client = await groq_client.get_client()
+    attempt = 0
+    while True:
+        # Queue until the shared Groq quota has room instead of firing and failing
+        reserved = await acquire_quota(prompt)
+        started = time.perf_counter()
+        try:
+            response = await client.chat.completions.create(
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt,
+                    }
+                ],
+                model=GROQ_MODEL,
+                temperature=GROQ_TEMPERATURE,
+                max_tokens=GROQ_MAX_TOKENS,
+                **options,
+            )
+            return response, reserved, started
+        except Exception as e:
+            observe_groq_call(operation, started, e)
+            retry_after = 0.0
+            if groq_client.is_rate_limit_error(e):
+                # Our estimate drifted from Groq's view; hold every worker back
+                retry_after = rate_limiter.retry_after_seconds(e)
+                await rate_limiter.scheduler.block_for(retry_after)
+            if attempt >= groq_client.GROQ_MAX_RETRIES or not groq_client.is_retryable_error(e):
+                raise
+            attempt += 1
+            logger.info(f"Retrying Groq call (attempt {attempt + 1}): {str(e)}")
+            if not retry_after:
+                # The scheduler already waits out a retry-after; back off for the rest
+                await asyncio.sleep(groq_client.retry_delay(attempt))
+
+async def complete_prompt(prompt: str) -> str:
+    """Send one prompt to Groq over the shared client and return the text"""
+    completion, reserved, started = await create_completion(prompt, "complete")
+    observe_groq_call("complete", started)
+    usage = getattr(completion, "usage", None)
+    metrics.observe_groq_usage(usage)
+    await rate_limiter.scheduler.settle(reserved, getattr(usage, "total_tokens", None))
+    return completion.choices[0].message.content.strip()
+
+async def summarize_chunk(text: str, index: int, total: int) -> str:
+    return await complete_prompt(build_chunk_prompt(text, index, total))
+
+async def reduce_summaries(summaries: List[str]) -> str:
+    return await complete_prompt(build_reduce_prompt(summaries))
+
+def log_chunk_progress(completed: int, total: int):
+    logger.debug(f"Summarized chunk {completed}/{total}")
+
+async def generate_summary(text: str):
+    """
+    Summarize text with Groq, consulting the summary cache first and falling
+    back to local summarization on any upstream error.
+    Returns (summary, fallback_reason); fallback_reason is None on success.
+    """
+    summary, fallback_reason, _ = await generate_summary_result(text)
+    return summary, fallback_reason
+
+async def generate_summary_result(text: str):
+    """
+    generate_summary for the job queue: returns (summary, fallback_reason,
+    retryable), where retryable says whether a fallback was caused by a
+    transient upstream failure worth trying again later.
+    """
+    # Serve repeated pastes from the summary cache. Entries are keyed by the
+    # preferred backend's model and only that backend's summaries are
+    # stored, so a hedge or failover answer from another backend is never
+    # served later as if the preferred one had written it
+    preferred = next(iter(backends.registry.routable()), None)
+    cache_key = summary_cache_key(text, preferred.model if preferred else GROQ_MODEL)
+    cached_summary = await summary_cache.cache.get(cache_key)
+    if cached_summary is not None:
+        metrics.SUMMARIES.labels("cache").inc()
+        return cached_summary, None, False
+    
+    # Identical texts in flight at the same time share one upstream call
+    return await singleflight.flights.do(cache_key, lambda: summarize_uncached(text, cache_key, preferred))
+
+
+def summary_cache_key(text: str, model: str) -> str:
+    return summary_cache.make_key(text, model, GROQ_TEMPERATURE, GROQ_MAX_TOKENS, PROMPT_VERSION)
+
+
+async def summarize_uncached(text: str, cache_key: str, preferred):
+    """The upstream half of generate_summary; run once per cache key at a time"""
+    async with singleflight.flights.cross_worker(cache_key) as was_free:
+        if not was_free:
+            # Another worker just summarized this text; its result is in the persistent cache
+            cached_summary = await summary_cache.cache.get(cache_key)
+            if cached_summary is not None:
+                metrics.SUMMARIES.labels("cache").inc()
+                return cached_summary, None, False
+        return await call_summarizer(text, cache_key, preferred)
+
+
+async def call_summarizer(text: str, cache_key: str, preferred):
+    """Summarize with the routed backend, falling back to local summarization if every backend fails"""
+    logger.debug("Routing summary request", extra={"chars": len(text)})
+    
+    try:
+        summary, backend = await routing.router.summarize(text)
+    except routing.AllBackendsFailed as e:
+        fallback_reason = "; ".join(describe_failure(name, error) for name, error in e.errors.items())
+        # The preferred backend's failure decides the metric label
+        cause = fallback_cause(e.first_error)
+        retryable = any(is_transient_error(error) for error in e.errors.values())
+        logger.warning(f"Summary backends failed, using fallback summary: {fallback_reason}")
+    except routing.NoBackendAvailable as e:
+        # Nothing configured (e.g. no GROQ_API_KEY): retrying won't change that
+        fallback_reason = str(e)
+        cause = "other"
+        retryable = False
+        logger.warning(f"{fallback_reason}, using fallback summary")
+    except Exception as e:
+        logger.exception(f"Unexpected error routing summary request, using fallback summary: {str(e)}")
+        fallback_reason = f"Unexpected error during summarization: {str(e)}"
+        cause = "other"
+        retryable = False
+    else:
+        logger.debug("Summary backend answered", extra={"backend": backend.name})
+        metrics.SUMMARIES.labels(backend.name).inc()
+        if backend is preferred:
+            await summary_cache.cache.set(cache_key, summary, backend.model)
+        return summary, None, False
+    
+    # Fallbacks are never cached so the next request tries the backends again
+    summary = await backends.registry.fallback.summarize(text)
+    metrics.FALLBACKS.labels(cause).inc()
+    metrics.SUMMARIES.labels("fallback").inc()
+    return summary, fallback_reason, retryable
+
+async def groq_summarize(text: str) -> str:
+    """The Groq backend: one prompt, or map-reduce over chunks for long inputs"""
+    if chunking.needs_chunking(text):
+        # Too long for one prompt: summarize chunks concurrently, then reduce
+        return await chunking.map_reduce(
+            text,
+            summarize_chunk,
+            reduce_summaries,
+            on_progress=log_chunk_progress,
+        )
+    return await complete_prompt(build_summarization_prompt(text))
+
+def register_backends():
+    """Register the summarization backends the router can choose from"""
+    backends.registry.register(backends.FunctionBackend(
+        "groq",
+        groq_summarize,
+        model=GROQ_MODEL,
+        cost_per_1k_tokens=backends.GROQ_COST_PER_1K_TOKENS,
+        available=lambda: bool(GROQ_API_KEY),
+    ))
+    huggingface = backends.huggingface_backend()
+    if huggingface is not None:
+        backends.registry.register(huggingface)
+    backends.registry.register(backends.FunctionBackend("extractive", fallback_summary, fallback_only=True))
+
+@router.post("/summarize", response_model=SummarizeResponse)
+async def summarize_text(request: SummarizeRequest):
     """
-    Summarize text using Groq's Llama model and generate a session ID
+    Summarize text with the best available backend and generate a session ID
     """
     if not request.text or len(request.text.strip()) < 10:
         raise HTTPException(status_code=400, detail="Text is too short to summarize")
     
     try:
-        print(f"Making API request to Groq with Llama 3.1 model...")
-        if GROQ_API_KEY:
-            print(f"API Key being used: {GROQ_API_KEY[:5]}...")
+        summary, _ = await generate_summary(request.text)
+        
+        # Generate a unique session ID for this summarization
+        note_session_id = str(uuid.uuid4())
         
-        # Create the prompt for summarization
-        summarization_prompt = f"""You are an AI assistant that summarizes text clearly and concisely.
+        return SummarizeResponse(summary=summary, note_session_id=note_session_id)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error during summarization: {str(e)}")
 
-Text to summarize:
-{request.text}
+@router.post("/summarize/batch", response_model=BatchSummarizeResponse)
+async def summarize_batch(request: Request, stream: bool = False, concurrency: Optional[int] = None):
+    """
+    Summarize many texts in one call. Accepts a JSON body
+    `{"texts": [...]}` or NDJSON (one `{"text": ...}` per line). Identical
+    inputs are summarized once. Results come back in input order, or as
+    NDJSON lines in completion order when `stream=true`.
+    """
+    texts = await parse_batch_texts(request)
+    if not texts:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(texts) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    
+    limit = max(1, min(concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    
+    if stream:
+        return StreamingResponse(
+            stream_batch_results(texts, limit),
+            media_type="application/x-ndjson"
+        )
+    
+    results = [None] * len(texts)
+    async for item in run_batch(texts, limit):
+        results[item.index] = item
+    return BatchSummarizeResponse(results=results)
 
-Please provide a summary of the above text that captures the main points. Keep the summary concise but comprehensive."""
+async def parse_batch_texts(request: Request) -> List[str]:
+    """Read batch texts from a JSON or NDJSON request body"""
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            texts = []
+            body = await request.body()
+            for line in body.decode("utf-8").splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                texts.append(item if isinstance(item, str) else item["text"])
+            return texts
+        
+        return BatchSummarizeRequest(**(await request.json())).texts
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid batch body: {str(e)}")
+
+async def run_batch(texts: List[str], limit: int):
+    """
+    Fan out unique texts with at most `limit` summaries in flight and yield
+    one BatchSummarizeItem per input as results complete
+    """
+    semaphore = asyncio.Semaphore(limit)
+    indexes_by_key = {}
+    for index, text in enumerate(texts):
+        key = summary_cache.normalize_text(text)
+        indexes_by_key.setdefault(key, []).append(index)
+    
+    async def summarize_one(text: str):
+        if not text or len(text.strip()) < 10:
+            return None, "Text is too short to summarize"
+        async with semaphore:
+            try:
+                return await generate_summary(text)
+            except Exception as e:
+                summary = await fallback_summary(text)
+                return summary, f"Error during summarization: {str(e)}"
+    
+    async def run_group(indexes: List[int]):
+        return indexes, await summarize_one(texts[indexes[0]])
+    
+    tasks = [asyncio.ensure_future(run_group(indexes)) for indexes in indexes_by_key.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            indexes, (summary, detail) = await next_done
+            for index in indexes:
+                if summary is None:
+                    yield BatchSummarizeItem(index=index, status="error", detail=detail)
+                else:
+                    # Each input still gets its own session ID
+                    yield BatchSummarizeItem(
+                        index=index,
+                        status="fallback" if detail else "ok",
+                        summary=summary,
+                        note_session_id=str(uuid.uuid4()),
+                        detail=detail
+                    )
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+async def stream_batch_results(texts: List[str], limit: int):
+    async for item in run_batch(texts, limit):
+        yield item.model_dump_json() + "\n"
+
+@router.post("/summarize/stream")
+async def summarize_text_stream(request: SummarizeRequest):
+    """
+    Stream a summary as Server-Sent Events: a `session` event with the
+    note_session_id, `delta` events as tokens arrive, then a `done` event
+    with usage stats
+    """
+    if not request.text or len(request.text.strip()) < 10:
+        raise HTTPException(status_code=400, detail="Text is too short to summarize")
+    
+    return StreamingResponse(
+        stream_summary_events(request.text),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Stop reverse proxies from buffering the stream
+        }
+    )
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-        print("Sending request to Groq API...")
+def extract_usage(chunk) -> Optional[dict]:
+    """Groq reports token usage on the final stream chunk under x_groq.usage"""
+    x_groq = getattr(chunk, "x_groq", None)
+    usage = x_groq.get("usage") if isinstance(x_groq, dict) else getattr(x_groq, "usage", None)
+    if usage is None:
+        return None
+    return usage if isinstance(usage, dict) else usage.model_dump()
+
+async def stream_summary_events(text: str):
+    started = time.perf_counter()
+    note_session_id = str(uuid.uuid4())
+    yield sse_event("session", {"note_session_id": note_session_id})
+    
+    # Streams come from Groq only (no routing, hedging or coalescing), so they
+    # read and write Groq's cache entries
+    cache_key = summary_cache_key(text, GROQ_MODEL)
+    cached_summary = await summary_cache.cache.get(cache_key)
+    if cached_summary is not None:
+        metrics.SUMMARIES.labels("cache").inc()
+        yield sse_event("delta", {"content": cached_summary})
+        yield sse_event("done", {
+            "usage": None,
+            "cached": True,
+            "fallback": False,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        })
+        return
+    
+    parts = []
+    usage = None
+    used_fallback = False
+    try:
+        if not GROQ_API_KEY:
+            raise Exception("No Groq API key configured")
         
-        try:
-            if GROQ_API_KEY:
-                # Initialize Groq client
-                client = groq.Groq(api_key=GROQ_API_KEY)
-                
-                # Make request to Groq API using the Llama model
-                completion = client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": summarization_prompt,
-                        }
-                    ],
-                    model="llama3-8b-8192",  # Using Llama 3 8B model
-                    temperature=0.3,  # Lower temperature for more consistent summaries
-                    max_tokens=1000,  # Reasonable limit for summaries
-                )
-                
-                print("Groq API request successful")
-            else:
-                raise Exception("No Groq API key configured")
-                
-        except groq.RateLimitError:
-            print("Groq API rate limit exceeded, using fallback summary")
-            # Fallback to intelligent summary
-            completion = create_fallback_summary(request.text)
-        except groq.APIError as e:
-            print(f"Groq API error: {str(e)}")
-            print("Falling back to intelligent text summarization...")
-            # Fallback to intelligent summary generation
-            completion = create_fallback_summary(request.text)
-        except Exception as e:
-            print(f"Unexpected error with Groq API: {str(e)}")
-            print("Using fallback summarization...")
-            # Fallback to intelligent summary generation
-            completion = create_fallback_summary(request.text)
+        if chunking.needs_chunking(text):
+            # Map-reduce runs in the background; forward its per-chunk progress
+            progress = asyncio.Queue()
+            
+            async def run_chunked():
+                try:
+                    return await chunking.map_reduce(
+                        text,
+                        summarize_chunk,
+                        reduce_summaries,
+                        on_progress=lambda completed, total: progress.put_nowait((completed, total)),
+                    )
+                finally:
+                    progress.put_nowait(None)
+            
+            task = asyncio.ensure_future(run_chunked())
+            try:
+                while True:
+                    item = await progress.get()
+                    if item is None:
+                        break
+                    yield sse_event("progress", {"completed": item[0], "total": item[1]})
+                summary = await task
+            finally:
+                if not task.done():
+                    task.cancel()  # Client went away mid-stream
+            
+            parts.append(summary)
+            yield sse_event("delta", {"content": summary})
+        else:
+            prompt = build_summarization_prompt(text)
+            # Retries stop here: once tokens are streamed they can't be taken back
+            stream, reserved, started_call = await create_completion(prompt, "stream", stream=True)
+            try:
+                async for chunk in stream:
+                    if chunk.choices:
+                        content = chunk.choices[0].delta.content
+                        if content:
+                            parts.append(content)
+                            yield sse_event("delta", {"content": content})
+                    usage = extract_usage(chunk) or usage
+            except Exception as e:
+                observe_groq_call("stream", started_call, e)
+                raise
+            finally:
+                # Also runs when the client disconnects: hand the connection back
+                # to the pool now and settle the reservation with what was used
+                await stream.close()
+                if usage:
+                    used_tokens = usage.get("total_tokens")
+                else:
+                    used_tokens = chunking.estimate_tokens(prompt) + chunking.estimate_tokens("".join(parts))
+                await rate_limiter.scheduler.settle(reserved, used_tokens)
+            observe_groq_call("stream", started_call)
+            metrics.observe_groq_usage(usage)
+    except Exception as e:
+        if parts:
+            # Tokens were already sent; a fallback summary can't replace them now
+            logger.warning(f"Groq stream interrupted: {str(e)}")
+            yield sse_event("error", {"detail": f"Summary stream interrupted: {str(e)}"})
+            return
+        logger.warning(f"Groq streaming error, using fallback summary: {str(e)}")
+        metrics.FALLBACKS.labels(fallback_cause(e)).inc()
+        summary = await fallback_summary(text)
+        used_fallback = True
+        parts = [summary]
+        yield sse_event("delta", {"content": summary})
+    
+    summary = "".join(parts).strip()
+    metrics.SUMMARIES.labels("fallback" if used_fallback else "groq").inc()
+    if not used_fallback:
+        await summary_cache.cache.set(cache_key, summary, GROQ_MODEL)
+    
+    yield sse_event("done", {
+        "usage": usage,
+        "cached": False,
+        "fallback": used_fallback,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    })
+
+@router.post("/jobs/summarize", response_model=SummarizeJobResponse, status_code=202)
+async def create_summarize_job(request: SummarizeRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Queue a summary and return at once. Poll GET /jobs/{job_id} (optionally
+    with `wait` to long-poll) for the result instead of holding the
+    connection open for the whole Groq round trip.
+    """
+    if not request.text or len(request.text.strip()) < 10:
+        raise HTTPException(status_code=400, detail="Text is too short to summarize")
+    
+    try:
+        job_id = await jobs.pool.enqueue(request.text)
+        job = await db.get(SummaryJob, job_id)
+        return job
+    except Exception as e:
+        logger.exception(f"Error queueing summary job: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error while queueing job")
+
+@router.get("/jobs/{job_id}", response_model=SummarizeJobResponse)
+async def get_summarize_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=60),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a summary job. With `wait` (seconds), long-poll: respond as soon as
+    the job succeeds or fails, or with its current state when time runs out.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    query = select(SummaryJob).where(SummaryJob.id == job_id).execution_options(populate_existing=True)
+    try:
+        while True:
+            job = (await db.execute(query)).scalars().first()
+            # End the read transaction so no pooled connection is held while we wait
+            # (commit, not rollback: rollback would expire the loaded job)
+            await db.commit()
+            if not job:
+                raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+            remaining = deadline - loop.time()
+            if job.status in jobs.TERMINAL_STATUSES or remaining <= 0:
+                return job
+            # Woken early if this worker runs the job; otherwise re-check the table
+            await jobs.pool.wait_for(job_id, min(remaining, jobs.JOB_POLL_INTERVAL))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error fetching summary job: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error while fetching job")
+
+def note_insert(values: dict):
+    """Dialect-specific INSERT so we can use ON CONFLICT"""
+    # Imported here so SQLite deployments never load the PostgreSQL dialect
+    if async_engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Note).values(**values)
+
+@router.post("/notes", response_model=NoteResponse)
+async def create_note(request: SaveNoteRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Save a new note with its summary and session ID to the database
+    """
+    try:
+        # One round trip, no check-then-insert race: the unique constraint
+        # on note_session_id decides, and RETURNING tells us who won
+        statement = (
+            note_insert({
+                "note_session_id": request.note_session_id,
+                "original_text": request.original_text,
+                "summary": request.summary
+            })
+            .on_conflict_do_nothing(index_elements=[Note.note_session_id])
+            # Echo the text from the request rather than decompress what we just stored
+            .returning(*(column for column in Note.__table__.columns if column.name != "original_text"))
+        )
+        before, after = search.index_statements(request.note_session_id, replace=False)
+        row = await execute_write(db, statement, before, after)
+        if row is None:
+            # If it exists, return 409 Conflict
+            raise HTTPException(
+                status_code=409, 
+                detail=f"Note with session ID {request.note_session_id} already exists. Use PUT to update."
+            )
         
-        print(f"Groq API response received")
+        replica_router.mark_written(request.note_session_id)
+        return NoteResponse(**row._mapping, original_text=request.original_text)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error creating note: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error while creating note")
+
+@router.put("/notes/{note_session_id}", response_model=NoteResponse)
+async def update_note(note_session_id: str, request: UpdateNoteRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Update an existing note's summary by its session ID. Pass the `version`
+    you last read to reject the write if someone else updated the note since
+    """
+    try:
+        statement = (
+            update(Note)
+            .where(Note.note_session_id == note_session_id)
+            .values(summary=request.summary, version=Note.version + 1)
+            .returning(*Note.__table__.columns)
+        )
+        if request.version is not None:
+            statement = statement.where(Note.version == request.version)
         
-        # Extract the summary from the response
-        summary = completion.choices[0].message.content.strip()
+        before, after = search.index_statements(note_session_id, replace=True)
+        row = await execute_write(db, statement, before, after)
+        if row is None:
+            # Nothing matched: either the note is gone or the version is stale
+            if request.version is not None:
+                current = (await db.execute(
+                    select(Note.version).where(Note.note_session_id == note_session_id)
+                )).scalar()
+                if current is not None:
+                    raise HTTPException(
+                        status_code=409,
+                        detail=f"Note with session ID {note_session_id} was modified (version {current}); reload and retry"
+                    )
+            raise HTTPException(status_code=404, detail=f"Note with session ID {note_session_id} not found")
         
-        # Generate a unique session ID for this summarization
-        note_session_id = str(uuid.uuid4())
+        replica_router.mark_written(note_session_id)
+        return NoteResponse(**row._mapping)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error updating note: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error while updating note")
+
+def encode_cursor(created_at: datetime, note_id: int) -> str:
+    """Opaque keyset cursor for the (created_at, id) position of the last row on a page"""
+    raw = json.dumps([created_at.isoformat(), note_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, note_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(note_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/notes", response_model=NotesPage)
+async def get_notes(
+    limit: int = Query(NOTES_PAGE_SIZE, ge=1, le=NOTES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    List saved notes, newest first, one page at a time. Only a preview of
+    each summary is returned; fetch /notes/{note_session_id} for full text.
+    Pass the returned next_cursor to get the following page.
+    """
+    try:
+        # Project just the list columns; original_text is never read here
+        query = select(
+            Note.id,
+            Note.note_session_id,
+            func.substr(Note.summary, 1, SUMMARY_PREVIEW_CHARS).label("summary_preview"),
+            Note.created_at,
+            Note.updated_at
+        )
+        if cursor:
+            # Keyset pagination: seek past the last row of the previous page
+            # using the (created_at, id) index instead of OFFSET scanning
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(tuple_(Note.created_at, Note.id) < tuple_(cursor_created_at, cursor_id))
         
-        return SummarizeResponse(summary=summary, note_session_id=note_session_id)
-    
+        rows = (await db.execute(query.order_by(Note.created_at.desc(), Note.id.desc()).limit(limit + 1))).all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        
+        return NotesPage(
+            notes=[NotePreview(**row._asdict()) for row in rows],
+            next_cursor=next_cursor
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error during summarization: {str(e)}")
+        logger.exception(f"Error fetching notes: {str(e)}")
+        await db.rollback()  # Rollback transaction on error
+        raise HTTPException(status_code=500, detail="Database error while fetching notes")
+
+@router.get("/notes/search", response_model=NoteSearchPage)
+async def search_notes(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(NOTES_PAGE_SIZE, ge=1, le=NOTES_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Full-text search over note text and summaries, best match first.
+    Snippets mark matched terms with <mark>...</mark>.
+    """
+    try:
+        rows = await search.search_notes(db, q, limit + 1, offset)
+        
+        next_offset = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_offset = offset + limit
+        
+        return NoteSearchPage(
+            results=[NoteSearchResult(**row) for row in rows],
+            next_offset=next_offset
+        )
+    except search.SearchUnavailable:
+        raise HTTPException(status_code=503, detail="Full-text search is not available on this database")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error searching notes: {str(e)}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error while searching notes")
+
+@router.get("/notes/{note_session_id}", response_model=NoteResponse)
+async def get_note_by_session_id(note_session_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Get a specific note by its session ID
+    """
+    try:
+        # The full note: load (and decompress) the original text too
+        query = select(Note).options(undefer(Note.original_text)).where(Note.note_session_id == note_session_id)
+        note = (await db.execute(query)).scalars().first()
+        if not note and db.info.get("replica"):
+            # Possibly saved through another worker and not replicated yet
+            async with AsyncSessionLocal() as primary:
+                note = (await primary.execute(query)).scalars().first()
+        if not note:
+            raise HTTPException(status_code=404, detail=f"Note with session ID {note_session_id} not found")
+        
+        return note
+    except Exception as e:
+        if "HTTPException" not in str(e.__class__):
+            logger.exception(f"Error fetching note: {str(e)}")
+            await db.rollback()  # Rollback transaction on error
+            raise HTTPException(status_code=500, detail="Database error while fetching note")
+        raise
+
+async def fallback_summary(text: str) -> str:
+    """Run the extractive fallback in the threadpool so long inputs don't stall the event loop"""
+    completion = await run_in_threadpool(create_fallback_summary, text)
+    return completion.choices[0].message.content.strip()
 
 def create_fallback_summary(text: str):
-    """Create an intelligent fallback summary when Groq API is unavailable"""
-    sentences = text.split('.')
-    sentences = [s.strip() for s in sentences if s.strip()]
+    """Create an extractive (TextRank) fallback summary when Groq API is unavailable"""
+    # NumPy is only needed here, so load it on the first fallback rather than at startup
+    from app import extractive
+    
+    sentences = extractive.split_sentences(text)
     
     if len(sentences) > 3:
-        # Take first sentence (often contains main topic)
-        selected_sentences = [sentences[0]]
-        # Add middle content
-        middle_idx = len(sentences) // 2
-        if middle_idx < len(sentences):
-            selected_sentences.append(sentences[middle_idx])
-        # Add conclusion if available
-        for i in range(len(sentences) - 1, 0, -1):
-            if sentences[i].strip() and len(sentences[i].strip()) > 15:
-                selected_sentences.append(sentences[i])
-                break
+        # Highest-ranked sentences, kept in their original order
+        selected_sentences = extractive.select_sentences(sentences)
         
         # Create an intelligent summary with bullet points
         summary_text = "Summary:\n\n• " + "\n\n• ".join(selected_sentences) + "\n\n[Generated using intelligent fallback summarization]"
@@ -222,6 +1042,42 @@ def create_fallback_summary(text: str):
     
     return MockCompletion([MockCompletion.Choice(MockCompletion.Choice.Message(summary_text))])
 
+def create_app() -> FastAPI:
+    """
+    Build the ASGI app. Importing this module only defines things; database,
+    Groq and worker resources are set up by the lifespan when the server starts.
+    """
+    app = FastAPI(
+        title="AI-Powered Note Summarizer API", 
+        description="A FastAPI backend for AI-powered text summarization",
+        version="1.0.0",
+        debug=DEBUG,
+        lifespan=lifespan
+    )
+    
+    # Per-route latency histograms for /metrics
+    app.add_middleware(metrics.MetricsMiddleware)
+    
+    # Request IDs for log correlation, echoed back in the X-Request-ID header
+    app.add_middleware(logging_setup.RequestIdMiddleware)
+    
+    # Add CORS middleware to allow frontend to communicate with API
+    origins = build_cors_origins()
+    logger.info(f"CORS enabled for origins: {origins}")
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    app.include_router(router)
+    return app
+
+# For `uvicorn app.main:app` and gunicorn; `--factory app.main:create_app` also works
+app = create_app()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host=HOST, port=PORT)
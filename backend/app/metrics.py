@@ -0,0 +1,147 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Prometheus metrics. run.py starts several uvicorn workers; each keeps its
+# own counters, so with PROMETHEUS_MULTIPROC_DIR set every worker writes its
+# samples to memory-mapped files in that directory and /metrics merges them,
+# whichever worker answers the scrape. The directory must be emptied before
+# the workers start (run.py and gunicorn_conf.py do this).
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DB_CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, until the last body byte is sent",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+GROQ_REQUEST_SECONDS = Histogram(
+    "groq_request_duration_seconds",
+    "Groq chat completion latency, excluding time queued for rate-limit quota",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+BACKEND_REQUEST_SECONDS = Histogram(
+    "summary_backend_request_duration_seconds",
+    "Summarization backend latency as seen by the router",
+    ["backend", "outcome"],  # ok or error
+    buckets=LATENCY_BUCKETS,
+)
+HEDGED_REQUESTS = Counter(
+    "summary_hedged_requests",
+    "Requests raced against a second backend, by whether the hedge answered first",
+    ["outcome"],  # won or lost
+)
+GROQ_QUEUE_SECONDS = Histogram(
+    "groq_rate_limit_wait_seconds",
+    "Time spent waiting for shared Groq quota before a call",
+    buckets=LATENCY_BUCKETS,
+)
+GROQ_TOKENS = Counter(
+    "groq_tokens",
+    "Tokens reported by Groq",
+    ["kind"],  # prompt or completion
+)
+SUMMARIES = Counter(
+    "summaries",
+    "Summaries produced, by where they came from",
+    ["source"],  # backend name (groq, huggingface), cache or fallback
+)
+FALLBACKS = Counter(
+    "summary_fallbacks",
+    "Summaries served by the extractive fallback, by cause",
+    ["cause"],  # rate_limit, api_error or other
+)
+SUMMARY_JOBS = Counter(
+    "summary_job_attempts",
+    "Finished background summary job attempts, by outcome",
+    ["outcome"],  # succeeded, retried or failed
+)
+COALESCED = Counter(
+    "summary_requests_coalesced",
+    "Summarize calls that shared another call's in-flight upstream request",
+    ["scope"],  # worker or cross_worker
+)
+CACHE_LOOKUPS = Counter(
+    "summary_cache_lookups",
+    "Summary cache lookups; hit rate = hit / (hit + miss)",
+    ["result", "tier"],
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_duration_seconds",
+    "Time to check a connection out of the pool (including pre-ping and retries)",
+    ["pool"],
+    buckets=DB_CHECKOUT_BUCKETS,
+)
+
+
+def observe_groq_usage(usage):
+    """Count tokens from a Groq usage object or dict; ignores missing usage"""
+    if usage is None:
+        return
+    for kind in ("prompt", "completion"):
+        field = f"{kind}_tokens"
+        value = usage.get(field) if isinstance(usage, dict) else getattr(usage, field, None)
+        if value:
+            GROQ_TOKENS.labels(kind).inc(value)
+
+
+def render():
+    """Exposition text for /metrics, merged across workers when multiprocess mode is on"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """Drop a dead worker's live gauges (for process managers that restart workers)"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing each HTTP request by its route template
+    (e.g. /notes/{note_session_id}), so path parameters don't explode label
+    cardinality. Streaming responses are timed to their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router records the matched route on the shared scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], path, str(status["code"])).observe(
+                time.perf_counter() - started
+            )
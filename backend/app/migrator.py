@@ -0,0 +1,312 @@
+import datetime
+import importlib.util
+import logging
+import os
+import re
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, inspect, select, text
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, migrations are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema migrations. Each script in backend/migrations/ is named
+# NNNN_description.py and defines upgrade(ctx); applied versions are recorded
+# in schema_migrations. Scripts are not wrapped in one transaction (PostgreSQL
+# can't build an index CONCURRENTLY inside one), so every step must be safe
+# to rerun: columns and indexes are added only if missing, and backfills
+# commit one batch at a time with a checkpoint in the same transaction, so
+# an interrupted run resumes after the last committed batch.
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))  # Rows per backfill transaction
+MIGRATION_BATCH_PAUSE = float(os.getenv("MIGRATION_BATCH_PAUSE", "0"))  # Seconds between batches, to leave room for live traffic
+
+_SCRIPT_NAME = re.compile(r"^(\d{4})_(\w+)\.py$")
+_LOCK_KEY = zlib.crc32(b"note-summarizer-migrations")  # PostgreSQL advisory lock id
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", String(16), primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_seconds", Float, nullable=False),
+)
+
+migration_checkpoints = Table(
+    "migration_checkpoints", _metadata,
+    Column("version", String(16), primary_key=True),
+    Column("step", String(100), primary_key=True),
+    Column("last_id", Integer, nullable=True),   # NULL once the step has finished
+    Column("rows_done", Integer, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+
+class Migration:
+    """One versioned script"""
+
+    def __init__(self, path: Path):
+        match = _SCRIPT_NAME.match(path.name)
+        self.version, self.name = match.group(1), match.group(2)
+        self.path = path
+        self._module = None
+
+    @property
+    def module(self):
+        if self._module is None:
+            spec = importlib.util.spec_from_file_location(f"migrations.m{self.version}", self.path)
+            self._module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(self._module)
+        return self._module
+
+    @property
+    def description(self) -> str:
+        return (self.module.__doc__ or self.name).strip().splitlines()[0]
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Migration scripts in version order"""
+    migrations = [Migration(path) for path in sorted(directory.glob("*.py")) if _SCRIPT_NAME.match(path.name)]
+    versions = [migration.version for migration in migrations]
+    duplicates = {version for version in versions if versions.count(version) > 1}
+    if duplicates:
+        raise RuntimeError(f"Duplicate migration versions: {', '.join(sorted(duplicates))}")
+    return migrations
+
+
+class MigrationContext:
+    """Operations available to a migration script's upgrade(ctx)"""
+
+    def __init__(self, engine, version: str, batch_size: int = MIGRATION_BATCH_SIZE, batch_pause: float = MIGRATION_BATCH_PAUSE):
+        self.engine = engine
+        self.version = version
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+
+    @property
+    def is_postgresql(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.engine).has_table(table)
+
+    def columns(self, table: str) -> set:
+        return {column["name"] for column in inspect(self.engine).get_columns(table)}
+
+    def indexes(self, table: str) -> set:
+        return {index["name"] for index in inspect(self.engine).get_indexes(table)}
+
+    def execute(self, sql: str, params: Optional[dict] = None):
+        """Run one statement in its own transaction"""
+        with self.engine.begin() as conn:
+            return conn.execute(text(sql), params or {})
+
+    def add_column(self, table: str, column: str, ddl: str):
+        """
+        ALTER TABLE ADD COLUMN if it's missing. Keep `ddl` to a nullable
+        column or a constant default: both are metadata-only changes on
+        PostgreSQL 11+ and SQLite, with no table rewrite.
+        """
+        if column in self.columns(table):
+            return False
+        logger.info(f"Adding {table}.{column}")
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        return True
+
+    def create_index(self, name: str, table: str, definition: str, unique: bool = False):
+        """
+        CREATE INDEX IF NOT EXISTS `name` ON `table` `definition`, where
+        definition is e.g. "(created_at, id)" or "USING GIN ((...))". On
+        PostgreSQL the index is built CONCURRENTLY, so writes to the table
+        carry on during the build; a build interrupted part way leaves an
+        INVALID index behind, which is dropped and rebuilt.
+        """
+        unique_sql = "UNIQUE " if unique else ""
+        if not self.is_postgresql:
+            self.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} {definition}")
+            return
+
+        # CONCURRENTLY refuses to run inside a transaction block
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            valid = conn.execute(
+                text("""
+                    SELECT i.indisvalid FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indexrelid
+                    WHERE c.relname = :name AND pg_table_is_visible(c.oid)
+                """),
+                {"name": name}
+            ).scalar()
+            if valid:
+                return
+            if valid is False:
+                logger.warning(f"Dropping invalid index {name} left by an interrupted build")
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            logger.info(f"Building index {name} concurrently")
+            conn.execute(text(f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}"))
+
+    def _checkpoint(self, conn, step: str):
+        return conn.execute(
+            select(migration_checkpoints.c.last_id, migration_checkpoints.c.rows_done)
+            .where(migration_checkpoints.c.version == self.version, migration_checkpoints.c.step == step)
+        ).first()
+
+    def _save_checkpoint(self, conn, step: str, last_id: Optional[int], rows_done: int, exists: bool):
+        values = {"last_id": last_id, "rows_done": rows_done, "updated_at": datetime.datetime.utcnow()}
+        if exists:
+            conn.execute(
+                migration_checkpoints.update()
+                .where(migration_checkpoints.c.version == self.version, migration_checkpoints.c.step == step)
+                .values(**values)
+            )
+        else:
+            conn.execute(migration_checkpoints.insert().values(version=self.version, step=step, **values))
+
+    def backfill(self, step: str, select_sql: str, update_sql: str, transform: Optional[Callable] = None) -> int:
+        """
+        Backfill a table in keyset batches of batch_size rows, one
+        transaction per batch, resuming after the last committed batch.
+
+        select_sql returns the next batch in id order and takes :after (the
+        last id done) and :limit; its first column must be `id`.
+
+        With transform, update_sql is executed once per batch with the list
+        of transform(row) dicts (one executemany). Without it, update_sql is
+        a single set-based statement over the batch's id range, taking
+        :first and :last, so the rows never leave the database.
+        """
+        with self.engine.begin() as conn:
+            checkpoint = self._checkpoint(conn, step)
+        if checkpoint is not None and checkpoint.last_id is None:
+            return checkpoint.rows_done
+        exists = checkpoint is not None
+        last_id = checkpoint.last_id if exists else 0
+        rows_done = checkpoint.rows_done if exists else 0
+        if exists:
+            logger.info(f"Resuming {step} after id {last_id} ({rows_done} rows done)")
+
+        while True:
+            with self.engine.begin() as conn:
+                rows = conn.execute(text(select_sql), {"after": last_id, "limit": self.batch_size}).all()
+                if rows:
+                    if transform is not None:
+                        conn.execute(text(update_sql), [transform(row) for row in rows])
+                    else:
+                        conn.execute(text(update_sql), {"first": rows[0].id, "last": rows[-1].id})
+                    last_id = rows[-1].id
+                    rows_done += len(rows)
+                # The checkpoint commits with the batch it describes
+                self._save_checkpoint(conn, step, last_id if rows else None, rows_done, exists)
+                exists = True
+            if not rows:
+                break
+            logger.info(f"{step}: {rows_done} rows (up to id {last_id})")
+            if self.batch_pause:
+                time.sleep(self.batch_pause)
+        return rows_done
+
+
+@contextmanager
+def migration_lock(engine):
+    """
+    Serialize migration runs, e.g. several replicas running run.py at once:
+    a session-level advisory lock on PostgreSQL, an flock next to the
+    database file on SQLite. The second runner waits, then finds nothing
+    left to do.
+    """
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+        return
+
+    database = engine.url.database
+    if fcntl is None or not database or database == ":memory:":
+        yield
+        return
+    fd = os.open(f"{database}.migrate.lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def applied_versions(engine) -> Dict[str, datetime.datetime]:
+    if not inspect(engine).has_table(schema_migrations.name):
+        return {}
+    with engine.connect() as conn:
+        return {row.version: row.applied_at for row in conn.execute(select(schema_migrations))}
+
+
+def pending(engine, migrations: Optional[List[Migration]] = None) -> List[str]:
+    """Versions of the known migrations not yet applied to this database"""
+    migrations = discover() if migrations is None else migrations
+    applied = applied_versions(engine)
+    return [migration.version for migration in migrations if migration.version not in applied]
+
+
+def status(engine, migrations: Optional[List[Migration]] = None) -> List[dict]:
+    """Every known migration with when it was applied and any unfinished backfill"""
+    migrations = discover() if migrations is None else migrations
+    applied = applied_versions(engine)
+    checkpoints = {}
+    if inspect(engine).has_table(migration_checkpoints.name):
+        with engine.connect() as conn:
+            for row in conn.execute(select(migration_checkpoints)):
+                checkpoints.setdefault(row.version, []).append(
+                    {"step": row.step, "last_id": row.last_id, "rows_done": row.rows_done}
+                )
+    return [
+        {
+            "version": migration.version,
+            "name": migration.name,
+            "description": migration.description,
+            "applied_at": applied.get(migration.version),
+            "checkpoints": checkpoints.get(migration.version, []),
+        }
+        for migration in migrations
+    ]
+
+
+def upgrade(engine, target: Optional[str] = None, batch_size: int = MIGRATION_BATCH_SIZE,
+            migrations: Optional[List[Migration]] = None) -> List[str]:
+    """Apply pending migrations up to and including `target` (default: all); returns the versions applied"""
+    migrations = discover() if migrations is None else migrations
+    done = []
+    with migration_lock(engine):
+        _metadata.create_all(bind=engine)
+        applied = applied_versions(engine)
+        for migration in migrations:
+            if target is not None and migration.version > target:
+                break
+            if migration.version in applied:
+                continue
+            logger.info(f"Applying {migration.version} {migration.name}: {migration.description}")
+            started = time.perf_counter()
+            migration.module.upgrade(MigrationContext(engine, migration.version, batch_size))
+            with engine.begin() as conn:
+                conn.execute(
+                    migration_checkpoints.delete().where(migration_checkpoints.c.version == migration.version)
+                )
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                    applied_at=datetime.datetime.utcnow(),
+                    duration_seconds=round(time.perf_counter() - started, 3),
+                ))
+            done.append(migration.version)
+    return done
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import asyncio
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl  # POSIX only; without it limits are tracked per worker
+except ImportError:
+    fcntl = None
+
+# Groq quota, shared by every worker on this host
+GROQ_RATE_LIMIT_ENABLED = os.getenv("GROQ_RATE_LIMIT_ENABLED", "True").lower() in ("true", "1", "t")
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "30000"))
+GROQ_QUEUE_TIMEOUT = float(os.getenv("GROQ_QUEUE_TIMEOUT", "30"))  # Max seconds a request waits for quota
+GROQ_RATE_LIMIT_STATE_FILE = os.getenv(
+    "GROQ_RATE_LIMIT_STATE_FILE",
+    os.path.join(tempfile.gettempdir(), "groq_rate_limit.json")
+)
+
+_MAX_SLEEP = 1.0  # Re-check shared state at least this often while queued
+
+
+class RateLimitQueueTimeout(Exception):
+    """Raised when a request waited longer than GROQ_QUEUE_TIMEOUT for quota"""
+
+
+class TokenBucketScheduler:
+    """
+    Requests-per-minute and tokens-per-minute token buckets. State lives in a
+    small file guarded by an exclusive flock so the uvicorn workers started by
+    run.py draw from one shared budget.
+    """
+
+    def __init__(self, rpm: float, tpm: float, state_file: str):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.state_file = state_file
+        self._thread_lock = threading.Lock()
+        self.queued = 0
+        self.waited_seconds = 0.0
+        self.timeouts = 0
+
+    @contextmanager
+    def _locked_state(self):
+        """Yield the shared bucket state and write it back on exit"""
+        with self._thread_lock:
+            fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.read(fd, 4096)
+                try:
+                    state = json.loads(raw) if raw else None
+                except ValueError:
+                    state = None
+                now = time.time()
+                if not state:
+                    state = {"requests": self.rpm, "tokens": self.tpm, "updated": now, "blocked_until": 0.0}
+
+                # Refill both buckets for the time elapsed since the last update
+                elapsed = max(0.0, now - state["updated"])
+                state["requests"] = min(self.rpm, state["requests"] + elapsed * self.rpm / 60.0)
+                state["tokens"] = min(self.tpm, state["tokens"] + elapsed * self.tpm / 60.0)
+                state["updated"] = now
+
+                yield state, now
+
+                data = json.dumps(state).encode("utf-8")
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, data)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def _try_acquire(self, tokens: float) -> float:
+        """Take one request and `tokens` tokens if available; otherwise return seconds to wait"""
+        with self._locked_state() as (state, now):
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+            if state["requests"] >= 1 and state["tokens"] >= tokens:
+                state["requests"] -= 1
+                state["tokens"] -= tokens
+                return 0.0
+            request_wait = max(0.0, (1 - state["requests"]) * 60.0 / self.rpm)
+            token_wait = max(0.0, (tokens - state["tokens"]) * 60.0 / self.tpm)
+            return max(request_wait, token_wait)
+
+    async def acquire(self, estimated_tokens: int) -> int:
+        """
+        Wait until the shared budget covers one request of `estimated_tokens`.
+        Returns the number of tokens reserved, to be reconciled with settle().
+        """
+        if not GROQ_RATE_LIMIT_ENABLED:
+            return 0
+
+        # A single request can never need more than a full bucket
+        tokens = min(float(estimated_tokens), self.tpm)
+        deadline = time.monotonic() + GROQ_QUEUE_TIMEOUT
+        started = time.monotonic()
+        queued = False
+
+        try:
+            while True:
+                # flock and file I/O block, so they run off the event loop
+                wait = await asyncio.to_thread(self._try_acquire, tokens)
+                if wait <= 0:
+                    return int(tokens)
+
+                if not queued:
+                    queued = True
+                    self.queued += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or wait > remaining + _MAX_SLEEP:
+                    self.timeouts += 1
+                    raise RateLimitQueueTimeout(f"Groq quota not available within {GROQ_QUEUE_TIMEOUT:.0f}s")
+                await asyncio.sleep(min(wait, _MAX_SLEEP, remaining))
+        finally:
+            if queued:
+                self.waited_seconds += time.monotonic() - started
+
+    async def settle(self, reserved_tokens: int, actual_tokens: Optional[int]):
+        """Refund (or charge) the difference between the estimate and real usage"""
+        if not GROQ_RATE_LIMIT_ENABLED or actual_tokens is None:
+            return
+        await asyncio.to_thread(self._settle, reserved_tokens, actual_tokens)
+
+    def _settle(self, reserved_tokens: int, actual_tokens: int):
+        with self._locked_state() as (state, now):
+            state["tokens"] = min(self.tpm, state["tokens"] + reserved_tokens - actual_tokens)
+
+    async def block_for(self, seconds: float):
+        """Pause all workers after Groq answers 429 with a retry-after"""
+        if not GROQ_RATE_LIMIT_ENABLED or seconds <= 0:
+            return
+        await asyncio.to_thread(self._block_for, seconds)
+
+    def _block_for(self, seconds: float):
+        with self._locked_state() as (state, now):
+            state["blocked_until"] = max(state["blocked_until"], now + seconds)
+
+    def stats(self):
+        return {
+            "enabled": GROQ_RATE_LIMIT_ENABLED,
+            "requests_per_minute": self.rpm,
+            "tokens_per_minute": self.tpm,
+            "shared_across_workers": fcntl is not None,
+            "queued_requests": self.queued,
+            "queue_wait_seconds": round(self.waited_seconds, 3),
+            "queue_timeouts": self.timeouts,
+        }
+
+
+def retry_after_seconds(error) -> float:
+    """Read the retry-after header from a Groq RateLimitError, if present"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return 0.0
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+scheduler = TokenBucketScheduler(GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE, GROQ_RATE_LIMIT_STATE_FILE)
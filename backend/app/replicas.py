@@ -0,0 +1,167 @@
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+# Read replicas (PostgreSQL only). Reads that tolerate a little replication
+# lag go to replicas round-robin; writes and reads right after a write stay
+# on the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "10"))  # Seconds
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30"))  # Lagging replicas are skipped
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))  # Read-your-writes window per note
+REPLICA_STICKY_MAX_ENTRIES = 10000
+
+# Replay lag; 0 when the replica has caught up with everything the primary sent
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def to_async_url(url: str) -> str:
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+
+class Replica:
+    def __init__(self, name: str, url: str, debug: bool = False):
+        self.name = name
+        self.engine = create_async_engine(
+            to_async_url(url),
+            pool_pre_ping=True,
+            pool_recycle=300,
+            pool_size=5,
+            max_overflow=10,
+            echo=debug,
+            connect_args={
+                "server_settings": {"timezone": "utc", "default_transaction_read_only": "on"}
+            }
+        )
+        self.sessionmaker = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        self.healthy = True  # Optimistic until the first check says otherwise
+        self.lag_seconds = 0.0
+        self.failures = 0
+        self.last_error = None
+        self.last_checked = None
+
+    async def check(self):
+        try:
+            async with self.engine.connect() as conn:
+                lag = (await conn.execute(LAG_QUERY)).scalar()
+            self.lag_seconds = float(lag or 0.0)
+            self.healthy = self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+            self.last_error = None if self.healthy else f"replication lag {self.lag_seconds:.1f}s"
+        except Exception as e:
+            self.healthy = False
+            self.failures += 1
+            self.last_error = str(e)
+        self.last_checked = time.time()
+
+
+class ReplicaRouter:
+    """Round-robin over healthy replicas with per-note read-your-writes stickiness"""
+
+    def __init__(self, urls: List[str], debug: bool = False):
+        self.replicas = [Replica(f"replica-{i}", url, debug) for i, url in enumerate(urls)]
+        self._next = 0
+        self._recent_writes = OrderedDict()  # note_session_id -> monotonic time of last write
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.sticky_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    async def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        await self.check_all()
+        self._task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def check_all(self):
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(REPLICA_HEALTH_CHECK_INTERVAL)
+            await self.check_all()
+
+    def mark_written(self, note_session_id: str):
+        """Pin reads of this note to the primary until replicas have caught up"""
+        with self._lock:
+            self._recent_writes[note_session_id] = time.monotonic()
+            self._recent_writes.move_to_end(note_session_id)
+            while len(self._recent_writes) > REPLICA_STICKY_MAX_ENTRIES:
+                self._recent_writes.popitem(last=False)
+
+    def is_sticky(self, note_session_id: Optional[str]) -> bool:
+        if note_session_id is None:
+            return False
+        with self._lock:
+            written = self._recent_writes.get(note_session_id)
+            if written is None:
+                return False
+            if time.monotonic() - written > REPLICA_STICKY_SECONDS:
+                del self._recent_writes[note_session_id]
+                return False
+            return True
+
+    def pick(self, note_session_id: Optional[str] = None) -> Optional[Replica]:
+        """Next healthy replica, or None to read from the primary"""
+        if not self.enabled:
+            return None
+        if self.is_sticky(note_session_id):
+            self.sticky_reads += 1
+            self.primary_reads += 1
+            return None
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+                if replica.healthy:
+                    self.replica_reads += 1
+                    return replica
+        self.primary_reads += 1
+        return None
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": round(replica.lag_seconds, 3),
+                    "failures": replica.failures,
+                    "last_error": replica.last_error,
+                    "last_checked": replica.last_checked,
+                }
+                for replica in self.replicas
+            ],
+        }
@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+from app import chunking, metrics
+from app.backends import BackendRegistry, SummarizerBackend, registry
+
+logger = logging.getLogger(__name__)
+
+# Latency-aware backend routing. Each request goes to the backend with the
+# lowest score (live p95 latency, inflated by its recent error rate, plus
+# the estimated cost of the call). If that backend hasn't answered by its
+# hedge deadline, the next-best backend is raced against it and the first
+# summary wins.
+ROUTER_PRIOR_LATENCY = float(os.getenv("ROUTER_PRIOR_LATENCY", "2.0"))  # Assumed p95 until a backend has data
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))  # Recent calls before live stats are trusted
+ROUTER_ERROR_PENALTY = float(os.getenv("ROUTER_ERROR_PENALTY", "4"))  # Score multiplier per unit of error rate
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))  # Above this a backend is only a last resort
+ROUTER_COST_WEIGHT = float(os.getenv("ROUTER_COST_WEIGHT", "100"))  # Seconds of latency one USD is worth; 100 = 1s per cent
+ROUTER_HEDGING_ENABLED = os.getenv("ROUTER_HEDGING_ENABLED", "True").lower() in ("true", "1", "t")
+ROUTER_HEDGE_MIN_DELAY = float(os.getenv("ROUTER_HEDGE_MIN_DELAY", "1.0"))  # Seconds
+ROUTER_HEDGE_MAX_DELAY = float(os.getenv("ROUTER_HEDGE_MAX_DELAY", "15.0"))  # Seconds
+
+
+class NoBackendAvailable(Exception):
+    """No configured backend can take this request"""
+
+
+class AllBackendsFailed(Exception):
+    """Every backend tried raised; errors are kept in the order they were tried"""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        self.errors = errors
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors.items()))
+
+    @property
+    def first_error(self) -> Exception:
+        return next(iter(self.errors.values()))
+
+
+class BackendRouter:
+    def __init__(self, backends: BackendRegistry):
+        self.backends = backends
+        self.hedged = 0
+        self.hedges_won = 0
+        self.failovers = 0
+
+    def _trusted(self, backend: SummarizerBackend) -> bool:
+        return backend.stats.samples >= ROUTER_MIN_SAMPLES
+
+    def expected_latency(self, backend: SummarizerBackend) -> float:
+        p95 = backend.stats.p95() if self._trusted(backend) else None
+        return p95 if p95 is not None else ROUTER_PRIOR_LATENCY
+
+    def error_rate(self, backend: SummarizerBackend) -> float:
+        return backend.stats.error_rate() if self._trusted(backend) else 0.0
+
+    def score(self, backend: SummarizerBackend, tokens: int) -> float:
+        """Lower is better"""
+        latency = self.expected_latency(backend) * (1 + ROUTER_ERROR_PENALTY * self.error_rate(backend))
+        return latency + ROUTER_COST_WEIGHT * backend.estimated_cost(tokens)
+
+    def rank(self, text: str) -> List[SummarizerBackend]:
+        """Backends that can take this text, best first; failing ones go last"""
+        tokens = chunking.estimate_tokens(text)
+        candidates = [backend for backend in self.backends.routable() if backend.accepts(tokens)]
+        # sorted() is stable, so ties keep the SUMMARY_BACKENDS order
+        return sorted(candidates, key=lambda backend: (
+            self.error_rate(backend) > ROUTER_MAX_ERROR_RATE,
+            self.score(backend, tokens),
+        ))
+
+    def hedge_delay(self, backend: SummarizerBackend) -> float:
+        return min(ROUTER_HEDGE_MAX_DELAY, max(ROUTER_HEDGE_MIN_DELAY, self.expected_latency(backend)))
+
+    async def _call(self, backend: SummarizerBackend, text: str) -> str:
+        started = time.perf_counter()
+        try:
+            summary = await backend.summarize(text)
+        except asyncio.CancelledError:
+            # Lost a hedge race, or the client went away. The call neither
+            # succeeded nor failed, and its latency is cut short, so it stays
+            # out of the samples that ranking and hedging read
+            backend.stats.record_cancelled()
+            raise
+        except Exception:
+            elapsed = time.perf_counter() - started
+            backend.stats.record(elapsed, ok=False)
+            metrics.BACKEND_REQUEST_SECONDS.labels(backend.name, "error").observe(elapsed)
+            raise
+        elapsed = time.perf_counter() - started
+        backend.stats.record(elapsed, ok=True)
+        metrics.BACKEND_REQUEST_SECONDS.labels(backend.name, "ok").observe(elapsed)
+        return summary
+
+    async def summarize(self, text: str) -> Tuple[str, SummarizerBackend]:
+        """
+        Summarize with the best backend, hedging once to the runner-up if it
+        is slow and failing over down the ranking on errors. Raises
+        NoBackendAvailable or AllBackendsFailed.
+        """
+        candidates = self.rank(text)
+        if not candidates:
+            raise NoBackendAvailable("No summarization backend configured (set GROQ_API_KEY or HF_API_KEY)")
+
+        errors: Dict[str, Exception] = {}
+        pending: Dict[asyncio.Task, SummarizerBackend] = {}
+        hedge_task = None
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            backend = candidates[next_index]
+            next_index += 1
+            task = asyncio.create_task(self._call(backend, text))
+            pending[task] = backend
+            return task
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if ROUTER_HEDGING_ENABLED and hedge_task is None and len(pending) == 1 and next_index < len(candidates):
+                    timeout = self.hedge_delay(next(iter(pending.values())))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Past the deadline: race the runner-up against the slow call
+                    hedge_task = launch()
+                    self.hedged += 1
+                    continue
+
+                for task in done:
+                    backend = pending.pop(task)
+                    try:
+                        summary = task.result()
+                    except Exception as e:
+                        logger.warning(f"{backend.name} backend failed: {str(e)}")
+                        errors[backend.name] = e
+                        continue
+                    if task is hedge_task:
+                        self.hedges_won += 1
+                        metrics.HEDGED_REQUESTS.labels("won").inc()
+                    elif hedge_task is not None:
+                        metrics.HEDGED_REQUESTS.labels("lost").inc()
+                    return summary, backend
+
+                if not pending and next_index < len(candidates):
+                    self.failovers += 1
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise AllBackendsFailed(errors)
+
+    def stats(self):
+        return {
+            "hedging": ROUTER_HEDGING_ENABLED,
+            "hedged": self.hedged,
+            "hedges_won": self.hedges_won,
+            "failovers": self.failovers,
+            "backends": self.backends.stats(),
+        }
+
+
+router = BackendRouter(registry)
@@ -0,0 +1,216 @@
+import re
+import html
+from typing import List
+
+from sqlalchemy import text
+
+# Full-text search over notes.original_text and notes.summary.
+# SQLite uses an external-content FTS5 table whose content is a view that
+# decodes the compressed note text with note_text() (registered on every
+# connection in app/database.py). The app keeps it in sync: every note write
+# carries index statements in the same transaction (index_statements). No
+# trigger calls note_text(), so other tools can still write to notes; run
+# `python migrate.py --rebuild-search-index` afterwards. PostgreSQL uses a
+# GIN expression index that the database maintains itself.
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+# The database marks matches with control characters; the snippet is then
+# HTML-escaped and only these become tags, so note text can't inject markup
+_MATCH_START = "\x02"
+_MATCH_END = "\x03"
+
+# Summary matches rank above matches in the original text
+PG_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(summary, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(original_text, '')), 'B')"
+)
+
+SQLITE_CONTENT_VIEW = "notes_fts_content"
+SQLITE_INDEX_DDL = [
+    f"""CREATE VIEW IF NOT EXISTS {SQLITE_CONTENT_VIEW} AS
+        SELECT id, note_text(original_text) AS original_text, summary FROM notes""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        original_text, summary, content='{SQLITE_CONTENT_VIEW}', content_rowid='id', tokenize='porter unicode61'
+    )""",
+]
+# Kept the index in sync before the app did; they called note_text(), which
+# only exists on the app's connections
+SQLITE_LEGACY_TRIGGERS = ["notes_fts_insert", "notes_fts_delete", "notes_fts_update"]
+SQLITE_INDEX_OBJECTS = [
+    ("TRIGGER", "notes_fts_insert"), ("TRIGGER", "notes_fts_delete"), ("TRIGGER", "notes_fts_update"), ("TABLE", "notes_fts"),
+]
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchUnavailable(Exception):
+    """Raised when the database has no full-text index (e.g. SQLite built without FTS5)"""
+
+
+def is_postgresql(engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def create_search_index(engine):
+    """Create the full-text index if it doesn't exist"""
+    with engine.begin() as conn:
+        if is_postgresql(engine):
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_notes_fts ON notes USING GIN (({PG_DOCUMENT}))"))
+            return
+
+        existing = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'")
+        ).scalar()
+        if existing is not None and SQLITE_CONTENT_VIEW not in existing:
+            # Index from before note text was compressed: it reads notes directly
+            for kind, name in SQLITE_INDEX_OBJECTS:
+                conn.execute(text(f"DROP {kind} IF EXISTS {name}"))
+            existing = None
+        for statement in SQLITE_INDEX_DDL:
+            conn.execute(text(statement))
+        for name in SQLITE_LEGACY_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        if existing is None:
+            # Index rows that were saved before the FTS table existed
+            conn.execute(text("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')"))
+
+
+def sqlite_index_state(conn) -> str:
+    """'missing', 'triggers' (an older index kept in sync by triggers) or 'app'"""
+    existing = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'")
+    ).scalar()
+    if existing is None or SQLITE_CONTENT_VIEW not in existing:
+        return "missing"
+    triggers = conn.execute(
+        text("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name = 'notes_fts_insert'")
+    ).scalar()
+    return "triggers" if triggers else "app"
+
+
+def search_index_ready(engine) -> bool:
+    """Whether the current form of the full-text index exists"""
+    with engine.connect() as conn:
+        if is_postgresql(engine):
+            return conn.execute(text("SELECT to_regclass('ix_notes_fts') IS NOT NULL")).scalar()
+        return sqlite_index_state(conn) == "app"
+
+
+def rebuild_search_index(engine):
+    """Re-index every note, e.g. after notes were written outside the app (SQLite)"""
+    if is_postgresql(engine):
+        return
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')"))
+
+
+# Whether note writes in this worker maintain the SQLite index; set at
+# startup by enable_index_writes once the index is in its current form
+_index_writes = False
+
+
+def enable_index_writes(engine):
+    global _index_writes
+    if is_postgresql(engine):
+        return
+    with engine.connect() as conn:
+        _index_writes = sqlite_index_state(conn) == "app"
+
+
+def index_statements(note_session_id: str, replace: bool):
+    """
+    (before, after) statements for execute_write that keep the SQLite index
+    in step with a write to one note: an insert, or with replace=True an
+    update. Both are empty on PostgreSQL and without the index.
+    """
+    if not _index_writes:
+        return (), ()
+    add = (
+        "INSERT INTO notes_fts(rowid, original_text, summary) "
+        "SELECT id, note_text(original_text), summary FROM notes WHERE note_session_id = :note_session_id"
+    )
+    if not replace:
+        # Only if the insert before it added the row (ON CONFLICT DO NOTHING may not have)
+        return (), (text(f"{add} AND changes() = 1").bindparams(note_session_id=note_session_id),)
+    # External-content FTS5 removes a row by its indexed values, read before they change
+    remove = text(
+        "INSERT INTO notes_fts(notes_fts, rowid, original_text, summary) "
+        "SELECT 'delete', id, note_text(original_text), summary FROM notes WHERE note_session_id = :note_session_id"
+    ).bindparams(note_session_id=note_session_id)
+    return (remove,), (text(add).bindparams(note_session_id=note_session_id),)
+
+
+def build_fts5_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 expression: every word is quoted (so
+    user input can't break MATCH syntax), all words must match, and the
+    last word also matches as a prefix for search-as-you-type.
+    """
+    terms = _TERM.findall(query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+async def search_notes(db, query: str, limit: int, offset: int) -> List[dict]:
+    """Return ranked matches with a highlighted snippet, best first"""
+    if is_postgresql(db.bind):
+        # Rank and paginate on the index first; build headlines only for the page
+        statement = text(f"""
+            SELECT n.id, n.note_session_id, n.created_at, n.updated_at, page.rank,
+                   ts_headline('english', coalesce(n.summary, '') || ' ' || coalesce(n.original_text, ''), page.query,
+                               :headline_options) AS snippet
+            FROM (
+                SELECT notes.id, ts_rank_cd({PG_DOCUMENT}, q) AS rank, q AS query
+                FROM notes, websearch_to_tsquery('english', :query) AS q
+                WHERE ({PG_DOCUMENT}) @@ q
+                ORDER BY rank DESC, notes.id DESC
+                LIMIT :limit OFFSET :offset
+            ) AS page
+            JOIN notes n ON n.id = page.id
+            ORDER BY page.rank DESC, n.id DESC
+        """)
+        rows = await db.execute(statement, {
+            "query": query,
+            "limit": limit,
+            "offset": offset,
+            "headline_options": f"StartSel={_MATCH_START}, StopSel={_MATCH_END}, MaxFragments=2, MaxWords=20, MinWords=5",
+        })
+        return [_with_safe_snippet(row) for row in rows]
+
+    match = build_fts5_query(query)
+    if not match:
+        return []
+    statement = text(f"""
+        SELECT n.id, n.note_session_id, n.created_at, n.updated_at,
+               -bm25(notes_fts, 1.0, 2.0) AS rank,
+               snippet(notes_fts, -1, :match_start, :match_end, '…', 16) AS snippet
+        FROM notes_fts
+        JOIN notes n ON n.id = notes_fts.rowid
+        WHERE notes_fts MATCH :match
+        ORDER BY bm25(notes_fts, 1.0, 2.0), n.id DESC
+        LIMIT :limit OFFSET :offset
+    """)
+    try:
+        rows = await db.execute(statement, {
+            "match": match,
+            "limit": limit,
+            "offset": offset,
+            "match_start": _MATCH_START,
+            "match_end": _MATCH_END,
+        })
+    except Exception as e:
+        if "no such table" in str(e) or "no such module" in str(e):
+            raise SearchUnavailable(str(e))
+        raise
+    return [_with_safe_snippet(row) for row in rows]
+
+
+def _with_safe_snippet(row) -> dict:
+    result = dict(row._mapping)
+    snippet = html.escape(result["snippet"] or "")
+    result["snippet"] = snippet.replace(_MATCH_START, SNIPPET_START).replace(_MATCH_END, SNIPPET_END)
+    return result
@@ -0,0 +1,71 @@
+import os
+import math
+import shutil
+import tempfile
+from typing import Optional
+
+# Process model for run.py and gunicorn_conf.py. Each worker is one asyncio
+# event loop: waits on Groq and the database overlap inside it, but only one
+# core's worth of Python runs at a time, and anything that blocks the loop
+# (compression, the extractive fallback, sync sessions' threadpool hops)
+# holds up every request on that worker. The worker count is the usable
+# CPUs times (1 + WORKER_IO_RATIO), the ratio being the extra workers per
+# core that keep the CPUs busy while workers are blocked.
+WEB_CONCURRENCY = os.getenv("WEB_CONCURRENCY")  # Fixed worker count; overrides the formula
+WORKER_IO_RATIO = float(os.getenv("WORKER_IO_RATIO", "1.0"))
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "16"))
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of the container, in CPUs, or None when unlimited"""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def cpu_count() -> int:
+    """CPUs this process may run on, capped by a container CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS, Windows
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return cpus
+
+
+def worker_count() -> int:
+    if WEB_CONCURRENCY:
+        return max(1, int(WEB_CONCURRENCY))
+    return max(1, min(MAX_WORKERS, round(cpu_count() * (1 + WORKER_IO_RATIO))))
+
+
+def prepare_metrics_dir() -> str:
+    """
+    Give the workers a shared, empty directory for Prometheus multiprocess
+    metrics. Leftover files from a previous run would be merged into the
+    new counters, so the directory is cleared on start, once per master:
+    gunicorn re-reads its config on HUP and must not delete the files of
+    workers that are still running.
+    """
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "note_summarizer_metrics")
+    if os.environ.get("METRICS_DIR_PREPARED_BY") != str(os.getpid()) and "GUNICORN_FD" not in os.environ:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.environ["METRICS_DIR_PREPARED_BY"] = str(os.getpid())
+    os.makedirs(metrics_dir, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir  # Inherited by the workers
+    return metrics_dir
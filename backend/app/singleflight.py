@@ -0,0 +1,207 @@
+import os
+import asyncio
+import logging
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+try:
+    import fcntl  # POSIX only; without it coalescing stays within each worker
+except ImportError:
+    fcntl = None
+
+from app import database, metrics, summary_cache
+
+logger = logging.getLogger(__name__)
+
+# Request coalescing. Identical texts summarized at the same time share one
+# upstream call: the first caller (the leader) runs it and everyone else with
+# the same cache key awaits its result. Across the uvicorn workers an advisory
+# lock lets one worker call Groq while the others wait and then read the
+# summary back from the persistent cache.
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "True").lower() in ("true", "1", "t")
+SINGLEFLIGHT_CROSS_WORKER = os.getenv("SINGLEFLIGHT_CROSS_WORKER", "False").lower() in ("true", "1", "t")
+SINGLEFLIGHT_LOCK_TIMEOUT = float(os.getenv("SINGLEFLIGHT_LOCK_TIMEOUT", "60"))  # Max seconds to wait for another worker
+SINGLEFLIGHT_LOCK_DIR = os.getenv("SINGLEFLIGHT_LOCK_DIR", os.path.join(tempfile.gettempdir(), "singleflight"))
+SINGLEFLIGHT_LOCK_POOL_SIZE = int(os.getenv("SINGLEFLIGHT_LOCK_POOL_SIZE", "10"))  # PostgreSQL connections for held locks
+SINGLEFLIGHT_LOCK_STRIPES = 65536  # Lock files on SQLite, named by the key's first 4 hex digits
+
+_LOCK_POOL_TIMEOUT = 0.5  # Seconds to wait for a lock connection before skipping coalescing
+
+_LOCK_POLL_INTERVAL = 0.05
+
+if SINGLEFLIGHT_CROSS_WORKER and not summary_cache.SUMMARY_CACHE_PERSISTENT:
+    # Without a shared cache waiting workers would just call Groq themselves
+    logger.warning("SINGLEFLIGHT_CROSS_WORKER needs SUMMARY_CACHE_PERSISTENT=True; coalescing within each worker only")
+    SINGLEFLIGHT_CROSS_WORKER = False
+
+
+class SingleFlight:
+    """
+    Per-process map of cache key -> in-flight task. The upstream call runs as
+    its own task, so a leader whose client disconnects doesn't cancel it for
+    the followers.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.cross_worker_followers = 0
+        self.lock_pool_exhausted = 0
+        self._lock_engine = None
+
+    def _get_lock_engine(self):
+        # A small pool of its own: a leader holds its connection for the whole
+        # upstream call, which must not starve the app's pool
+        if self._lock_engine is None:
+            self._lock_engine = create_async_engine(
+                database.ASYNC_DATABASE_URL,
+                pool_pre_ping=True,
+                pool_recycle=300,
+                pool_size=SINGLEFLIGHT_LOCK_POOL_SIZE,
+                max_overflow=0,
+                pool_timeout=_LOCK_POOL_TIMEOUT,
+            )
+        return self._lock_engine
+
+    async def stop(self):
+        if self._lock_engine is not None:
+            await self._lock_engine.dispose()
+            self._lock_engine = None
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        if not SINGLEFLIGHT_ENABLED:
+            return await fn()
+
+        task = self._flights.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.create_task(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.followers += 1
+            metrics.COALESCED.labels("worker").inc()
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved; every waiter already got it
+
+    @asynccontextmanager
+    async def cross_worker(self, key: str):
+        """
+        Hold the cross-worker lock for this key while computing it. Yields True
+        if the lock was free, False if another worker held it (so the result
+        may now be in the persistent cache). A lock that can't be taken in
+        time is treated as free rather than failing the request.
+        """
+        if not SINGLEFLIGHT_CROSS_WORKER:
+            yield True
+            return
+        if database.async_engine.dialect.name == "postgresql":
+            lock = self._pg_lock(key)
+        elif fcntl is not None:
+            lock = self._file_lock(key)
+        else:
+            yield True
+            return
+        async with lock as was_free:
+            if not was_free:
+                self.cross_worker_followers += 1
+                metrics.COALESCED.labels("cross_worker").inc()
+            yield was_free
+
+    @asynccontextmanager
+    async def _pg_lock(self, key: str):
+        # Session-level advisory lock on a dedicated connection
+        lock_id = int.from_bytes(bytes.fromhex(key[:16]), "big", signed=True)
+        try:
+            conn = await self._get_lock_engine().connect()
+        except PoolTimeoutError:
+            conn = None
+        if conn is None:
+            # Every lock connection is held by a leader: skip coalescing rather than queue
+            self.lock_pool_exhausted += 1
+            yield True
+            return
+        try:
+            was_free = (await conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id})).scalar()
+            await conn.commit()
+            held = was_free
+            if not was_free:
+                try:
+                    async with conn.begin():
+                        # pg_advisory_lock honours lock_timeout, so a stuck leader can't hold
+                        # followers forever; set locally so it ends with the transaction
+                        await conn.execute(
+                            text("SELECT set_config('lock_timeout', :ms, true)"),
+                            {"ms": str(int(SINGLEFLIGHT_LOCK_TIMEOUT * 1000))},
+                        )
+                        await conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": lock_id})
+                    held = True
+                except Exception as e:
+                    logger.warning(f"Gave up waiting for another worker's summary: {str(e)}")
+            try:
+                yield was_free
+            finally:
+                if held:
+                    await conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+                    await conn.commit()
+        finally:
+            await conn.close()
+
+    @asynccontextmanager
+    async def _file_lock(self, key: str):
+        # One host only (SQLite deployments); the lock is polled so the event
+        # loop never blocks in flock
+        os.makedirs(SINGLEFLIGHT_LOCK_DIR, exist_ok=True)
+        # flock conflicts between any two open files, even in one process, so
+        # unrelated texts sharing a stripe would wait on each other's calls;
+        # with 65536 stripes that is rare and the directory stays bounded
+        fd = os.open(os.path.join(SINGLEFLIGHT_LOCK_DIR, f"{key[:4]}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            was_free = held = self._try_flock(fd)
+            if not held:
+                deadline = asyncio.get_running_loop().time() + SINGLEFLIGHT_LOCK_TIMEOUT
+                while not held and asyncio.get_running_loop().time() < deadline:
+                    await asyncio.sleep(_LOCK_POLL_INTERVAL)
+                    held = self._try_flock(fd)
+                if not held:
+                    logger.warning("Gave up waiting for another worker's summary")
+            try:
+                yield was_free
+            finally:
+                if held:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _try_flock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def stats(self):
+        return {
+            "enabled": SINGLEFLIGHT_ENABLED,
+            "cross_worker": SINGLEFLIGHT_CROSS_WORKER,
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "cross_worker_followers": self.cross_worker_followers,
+            "lock_pool_exhausted": self.lock_pool_exhausted,
+        }
+
+
+flights = SingleFlight()
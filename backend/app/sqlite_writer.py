@@ -0,0 +1,163 @@
+import os
+import asyncio
+import time
+from typing import List, Optional
+
+from sqlalchemy.exc import ResourceClosedError
+
+# Single-writer group commit for SQLite. SQLite allows one writer at a time;
+# funnelling every write in a worker through one connection avoids lock
+# contention between pooled connections, and committing a batch of
+# statements in one transaction pays for one WAL sync instead of one per write.
+SQLITE_WRITE_BATCH_MAX = int(os.getenv("SQLITE_WRITE_BATCH_MAX", "64"))  # Statements per transaction
+# Extra seconds to wait for more writes. 0 batches whatever queued up while
+# the previous commit was running, which adds no latency when idle
+SQLITE_WRITE_BATCH_WINDOW = float(os.getenv("SQLITE_WRITE_BATCH_WINDOW", "0"))
+
+
+def first_row(result):
+    """First RETURNING row of a write, or None for statements that return nothing"""
+    try:
+        return result.first()
+    except ResourceClosedError:
+        return None
+
+
+async def execute_group(conn, statements):
+    """
+    Run statements that must commit together, in order, and return the
+    first RETURNING row any of them produced
+    """
+    result = None
+    for statement in statements:
+        row = first_row(await conn.execute(statement))
+        if result is None:
+            result = row
+    return result
+
+
+class WriterClosed(Exception):
+    """Raised when a write is submitted after the writer has stopped"""
+
+
+class GroupCommitWriter:
+    """
+    Serializes writes through one connection and commits them in batches.
+    submit() takes a statement or a tuple of statements that must commit
+    together, and resolves with the first RETURNING row (or None) once the
+    batch containing it has committed.
+    """
+
+    def __init__(self, engine, batch_max: int = SQLITE_WRITE_BATCH_MAX, batch_window: float = SQLITE_WRITE_BATCH_WINDOW):
+        self.engine = engine
+        self.batch_max = batch_max
+        self.batch_window = batch_window
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.statements = 0
+        self.isolated_retries = 0  # Batches replayed one statement per transaction after an error
+        self.max_batch_size = 0
+        self.commit_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Commit whatever is queued, then stop the writer task"""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, statements):
+        if not self.running:
+            raise WriterClosed("SQLite writer is not running")
+        if not isinstance(statements, tuple):
+            statements = (statements,)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((statements, future))
+        return await future
+
+    async def _next_batch(self) -> List[tuple]:
+        """Block for the first write, then collect more until the batch is full or the window closes"""
+        item = await self._queue.get()
+        if item is None:
+            return []
+        batch = [item]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_max:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                # Stop requested: finish this batch and let the loop exit next time round
+                self._queue.put_nowait(None)
+                break
+            batch.append(item)
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                return
+            await self._commit(batch)
+
+    async def _commit(self, batch: List[tuple]):
+        started = time.perf_counter()
+        try:
+            async with self.engine.begin() as conn:
+                rows = [await execute_group(conn, statements) for statements, _ in batch]
+        except Exception:
+            # One bad statement must not fail its neighbours: replay each on its own
+            self.isolated_retries += 1
+            await self._commit_individually(batch)
+        else:
+            for (_, future), row in zip(batch, rows):
+                if not future.done():
+                    future.set_result(row)
+        finally:
+            self.batches += 1
+            self.statements += len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            self.commit_seconds += time.perf_counter() - started
+
+    async def _commit_individually(self, batch: List[tuple]):
+        for statements, future in batch:
+            try:
+                async with self.engine.begin() as conn:
+                    row = await execute_group(conn, statements)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(row)
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "statements": self.statements,
+            "avg_batch_size": round(self.statements / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "avg_commit_ms": round(self.commit_seconds / self.batches * 1000, 3) if self.batches else 0.0,
+            "isolated_retries": self.isolated_retries,
+        }
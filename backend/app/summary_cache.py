@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "True").lower() in ("true", "1", "t")
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1024"))
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", "86400"))  # Seconds
+SUMMARY_CACHE_PERSISTENT = os.getenv("SUMMARY_CACHE_PERSISTENT", "False").lower() in ("true", "1", "t")
+SUMMARY_CACHE_PERSISTENT_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_PERSISTENT_MAX_ENTRIES", "100000"))
+SUMMARY_CACHE_PRUNE_EVERY = int(os.getenv("SUMMARY_CACHE_PRUNE_EVERY", "100"))  # Writes between prunes
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different pastes share a cache entry"""
+    return " ".join(text.split())
+
+
+def make_key(text: str, model: str, temperature: float, max_tokens: int, prompt_version: str) -> str:
+    """Content-addressed cache key for a summarization request"""
+    payload = json.dumps(
+        [normalize_text(text), model, temperature, max_tokens, prompt_version],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SummaryCache:
+    """
+    Two-tier summary cache: an in-process LRU in front of an optional
+    persistent table in the notes database.
+    """
+
+    def __init__(self):
+        self.memory = LRUCache(SUMMARY_CACHE_MAX_ENTRIES, SUMMARY_CACHE_TTL)
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self._writes = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        if not SUMMARY_CACHE_ENABLED:
+            return None
+
+        summary = self.memory.get(key)
+        if summary is not None:
+            self.hits += 1
+            metrics.CACHE_LOOKUPS.labels("hit", "memory").inc()
+            return summary
+
+        if SUMMARY_CACHE_PERSISTENT:
+            try:
+                summary = await _db_get(key)
+            except Exception as e:
+                logger.warning(f"Summary cache lookup error: {str(e)}")
+                summary = None
+            if summary is not None:
+                self.memory.set(key, summary)
+                self.hits += 1
+                self.persistent_hits += 1
+                metrics.CACHE_LOOKUPS.labels("hit", "persistent").inc()
+                return summary
+
+        self.misses += 1
+        metrics.CACHE_LOOKUPS.labels("miss", "persistent" if SUMMARY_CACHE_PERSISTENT else "memory").inc()
+        return None
+
+    async def set(self, key: str, summary: str, model: str):
+        if not SUMMARY_CACHE_ENABLED:
+            return
+
+        self.memory.set(key, summary)
+
+        if SUMMARY_CACHE_PERSISTENT:
+            self._writes += 1
+            prune = self._writes % SUMMARY_CACHE_PRUNE_EVERY == 0
+            try:
+                await _db_set(key, summary, model, prune)
+            except Exception as e:
+                logger.warning(f"Summary cache write error: {str(e)}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": SUMMARY_CACHE_ENABLED,
+            "persistent": SUMMARY_CACHE_PERSISTENT,
+            "entries": len(self.memory),
+            "max_entries": SUMMARY_CACHE_MAX_ENTRIES,
+            "hits": self.hits,
+            "misses": self.misses,
+            "persistent_hits": self.persistent_hits,
+            "evictions": self.memory.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+async def _db_get(key: str) -> Optional[str]:
+    from app.database import AsyncSessionLocal, SummaryCacheEntry
+
+    # Expired rows are ignored here and deleted by the next prune
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(SummaryCacheEntry.summary).where(
+                SummaryCacheEntry.cache_key == key,
+                SummaryCacheEntry.expires_at > datetime.datetime.utcnow(),
+            )
+        )).scalar()
+
+
+async def _db_set(key: str, summary: str, model: str, prune: bool):
+    """Upsert through execute_write, i.e. the SQLite group-commit writer when it is running"""
+    from app.database import AsyncSessionLocal, SummaryCacheEntry, async_engine, execute_write
+
+    # Imported here so SQLite deployments never load the PostgreSQL dialect
+    if async_engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    now = datetime.datetime.utcnow()
+    values = {
+        "summary": summary,
+        "model": model,
+        "created_at": now,
+        "expires_at": now + datetime.timedelta(seconds=SUMMARY_CACHE_TTL),
+    }
+    statement = (
+        insert(SummaryCacheEntry)
+        .values(cache_key=key, **values)
+        .on_conflict_do_update(index_elements=[SummaryCacheEntry.cache_key], set_=values)
+    )
+    async with AsyncSessionLocal() as db:
+        await execute_write(db, statement)
+        if prune:
+            await _db_prune(db, now)
+
+
+async def _db_prune(db, now: datetime.datetime):
+    """Drop expired rows, then trim the oldest rows beyond the size bound"""
+    from app.database import SummaryCacheEntry, execute_write
+
+    await execute_write(db, delete(SummaryCacheEntry).where(SummaryCacheEntry.expires_at <= now))
+
+    cutoff = (await db.execute(
+        select(SummaryCacheEntry.created_at)
+        .order_by(SummaryCacheEntry.created_at.desc())
+        .offset(SUMMARY_CACHE_PERSISTENT_MAX_ENTRIES)
+        .limit(1)
+    )).scalar()
+    await db.commit()
+    if cutoff is not None:
+        await execute_write(db, delete(SummaryCacheEntry).where(SummaryCacheEntry.created_at <= cutoff))
+
+
+cache = SummaryCache()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite
+Starts the mock Groq server (mock_groq.py) and the API against it on a
+fresh SQLite file, then runs each scenario with a concurrent load generator:
+
+- summarize: POST /summarize with generated notes, a --repeat-ratio share
+  of them repeats of earlier ones (cache hits)
+- notes: POST /notes, PUT /notes/{id}, GET /notes/{id} and GET /notes
+
+Reports requests per second, p50/p95/p99 latency, the error rate and, for
+summarize, the fallback rate (from the app's own /metrics) and how many
+upstream calls and 429s the mock saw, as JSON. With --baseline the run is
+compared with a report saved earlier by --save, and the script exits 1 if
+a scenario regressed by more than --tolerance.
+
+Baselines are only comparable on the same machine with the same options;
+each report records the options it was run with.
+
+Usage:
+    python benchmarks/bench_e2e.py
+    python benchmarks/bench_e2e.py --groq-latency 1.5 --groq-jitter 0.5 --groq-rpm 600 --groq-error-rate 0.05
+    python benchmarks/bench_e2e.py --save benchmarks/results/e2e.json
+    python benchmarks/bench_e2e.py --baseline benchmarks/results/e2e.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from bench_extractive import generate_note
+from bench_sqlite_mixed import wait_until_ready
+from load_summarize import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.join(BACKEND_DIR, "benchmarks")
+
+SCENARIOS = ("summarize", "notes")
+
+_SUMMARIES_SAMPLE = re.compile(r'^summaries_total\{source="([^"]+)"\} ([0-9.e+]+)$', re.MULTILINE)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock(port: int, args):
+    command = [
+        sys.executable, os.path.join(BENCHMARKS_DIR, "mock_groq.py"), "--port", str(port),
+        "--latency", str(args.groq_latency), "--jitter", str(args.groq_jitter),
+        "--rpm", str(args.groq_rpm), "--tpm", str(args.groq_tpm),
+        "--error-rate", str(args.groq_error_rate), "--error-status", str(args.groq_error_status),
+    ]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL)
+
+
+def start_app(port: int, groq_port: int, directory: str, args):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(directory, 'notes.db')}",
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(directory, "metrics"),
+        "GROQ_API_KEY": "gsk_benchmark",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}",
+        "SUMMARY_BACKENDS": "groq",
+        # The app's quota is configured to match the provider's, as in production
+        "GROQ_RATE_LIMIT_ENABLED": str(bool(args.groq_rpm or args.groq_tpm)),
+        "GROQ_REQUESTS_PER_MINUTE": str(args.groq_rpm or 10**9),
+        "GROQ_TOKENS_PER_MINUTE": str(args.groq_tpm or 10**9),
+        "DEBUG": "False",
+        "LOG_LEVEL": "WARNING",
+    })
+    os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+    # Create the schema once before workers race to do it
+    subprocess.run([sys.executable, "-c", "from app.database import init_db; init_db()"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--port", str(port), "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+async def summaries_by_source(client: httpx.AsyncClient):
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    return {source: float(value) for source, value in _SUMMARIES_SAMPLE.findall(response.text)}
+
+
+async def drive(total: int, concurrency: int, request):
+    """Run `request(i)` `total` times from `concurrency` workers; returns latencies and failures by operation"""
+    latencies, failures = {}, {}
+    remaining = iter(range(total))
+
+    async def worker():
+        for i in remaining:
+            start = time.perf_counter()
+            try:
+                operation, response = await request(i)
+                ok = response.status_code < 400
+                failure = f"{operation}_{response.status_code}"
+            except httpx.HTTPError as e:
+                operation, ok, failure = "request", False, type(e).__name__
+            if ok:
+                latencies.setdefault(operation, []).append(time.perf_counter() - start)
+            else:
+                failures[failure] = failures.get(failure, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, failures, time.perf_counter() - started
+
+
+def summarize_latencies(latencies, failures, elapsed: float, total: int):
+    values = [value for operation in latencies.values() for value in operation]
+    report = {
+        "requests": total,
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p95_ms": round(percentile(values, 95) * 1000, 1),
+        "p99_ms": round(percentile(values, 99) * 1000, 1),
+        "error_rate": round(sum(failures.values()) / total, 4) if total else 0.0,
+        "errors": failures,
+    }
+    if len(latencies) > 1:
+        report["operations"] = {
+            operation: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+            }
+            for operation, values in sorted(latencies.items())
+        }
+    return report
+
+
+async def run_summarize(client: httpx.AsyncClient, mock: httpx.AsyncClient, args):
+    rng = random.Random(args.seed)
+    texts = []
+
+    def next_text():
+        if texts and rng.random() < args.repeat_ratio:
+            return rng.choice(texts)
+        texts.append(generate_note(int(rng.lognormvariate(7.2, 0.5)), rng))
+        return texts[-1]
+
+    bodies = [{"text": next_text()} for _ in range(args.summarize_requests)]
+
+    async def request(i):
+        return "summarize", await client.post("/summarize", json=bodies[i])
+
+    sources_before = await summaries_by_source(client)
+    upstream_before = (await mock.get("/stats")).json()
+    latencies, failures, elapsed = await drive(len(bodies), args.concurrency, request)
+    sources = await summaries_by_source(client)
+    upstream = (await mock.get("/stats")).json()
+
+    produced = {source: sources.get(source, 0) - sources_before.get(source, 0) for source in sources}
+    total = sum(produced.values())
+    report = summarize_latencies(latencies, failures, elapsed, len(bodies))
+    report["fallback_rate"] = round(produced.get("fallback", 0) / total, 4) if total else 0.0
+    report["cache_hit_rate"] = round(produced.get("cache", 0) / total, 4) if total else 0.0
+    report["upstream"] = {key: upstream[key] - upstream_before.get(key, 0) for key in ("calls", "ok", "rate_limited", "errors")}
+    return report
+
+
+async def run_notes(client: httpx.AsyncClient, args):
+    rng = random.Random(args.seed)
+    session_ids = []
+    for i in range(50):
+        note_session_id = str(uuid.uuid4())
+        response = await client.post("/notes", json={
+            "note_session_id": note_session_id,
+            "original_text": generate_note(1500, rng),
+            "summary": f"Summary of seed note {i}.",
+        })
+        response.raise_for_status()
+        session_ids.append(note_session_id)
+
+    async def request(i):
+        roll = rng.random()
+        if roll < 0.2:
+            note_session_id = str(uuid.uuid4())
+            response = await client.post("/notes", json={
+                "note_session_id": note_session_id,
+                "original_text": generate_note(1500, rng),
+                "summary": "Load test summary.",
+            })
+            if response.status_code == 200:
+                session_ids.append(note_session_id)
+            return "create", response
+        if roll < 0.3:
+            return "update", await client.put(f"/notes/{rng.choice(session_ids)}", json={"summary": f"Updated {i}"})
+        if roll < 0.8:
+            return "get", await client.get(f"/notes/{rng.choice(session_ids)}")
+        return "list", await client.get("/notes", params={"limit": 20})
+
+    latencies, failures, elapsed = await drive(args.notes_requests, args.concurrency, request)
+    return summarize_latencies(latencies, failures, elapsed, args.notes_requests)
+
+
+async def run_scenarios(url: str, groq_url: str, scenarios, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client, \
+            httpx.AsyncClient(base_url=groq_url, timeout=10) as mock:
+        # Warm every worker's pools and the Groq client before measuring
+        await asyncio.gather(*(client.get("/notes", params={"limit": 1}) for _ in range(args.workers * 4)))
+        results = {}
+        for scenario in scenarios:
+            if scenario == "summarize":
+                results[scenario] = await run_summarize(client, mock, args)
+            else:
+                results[scenario] = await run_notes(client, args)
+        return results
+
+
+def compare(results, baseline, tolerance: float, rate_tolerance: float):
+    """Relative changes per scenario, and the regressions beyond the tolerances"""
+    changes, regressions = {}, []
+    for scenario, current in results.items():
+        before = baseline.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        change = {}
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            if before.get(key):
+                change[key] = round(current[key] / before[key] - 1, 4)
+        if change.get("rps", 0) < -tolerance:
+            regressions.append(f"{scenario}: throughput {change['rps']:+.1%}")
+        # p99 rests on a handful of samples per run, so it is reported but not gated
+        for key in ("p50_ms", "p95_ms"):
+            if change.get(key, 0) > tolerance:
+                regressions.append(f"{scenario}: {key} {change[key]:+.1%}")
+        for key in ("error_rate", "fallback_rate"):
+            if key in current and key in before:
+                change[key] = round(current[key] - before[key], 4)
+                if change[key] > rate_tolerance:
+                    regressions.append(f"{scenario}: {key} {before[key]:.2%} -> {current[key]:.2%}")
+        changes[scenario] = change
+    return changes, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against a mock Groq server")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--summarize-requests", type=int, default=1000)
+    parser.add_argument("--notes-requests", type=int, default=3000)
+    parser.add_argument("--repeat-ratio", type=float, default=0.2, help="Fraction of summarize texts sent before")
+    parser.add_argument("--database-url", help="Run against this database instead of a fresh SQLite file")
+    parser.add_argument("--groq-latency", type=float, default=0.5, help="Median mock Groq latency in seconds")
+    parser.add_argument("--groq-jitter", type=float, default=0.3, help="Log-normal sigma of the mock latency")
+    parser.add_argument("--groq-rpm", type=int, default=0, help="Mock requests-per-minute limit; 0 = unlimited")
+    parser.add_argument("--groq-tpm", type=int, default=0, help="Mock tokens-per-minute limit; 0 = unlimited")
+    parser.add_argument("--groq-error-rate", type=float, default=0.0)
+    parser.add_argument("--groq-error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Compare with a report saved by --save; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative drop in RPS or rise in p50/p95")
+    parser.add_argument("--rate-tolerance", type=float, default=0.02, help="Allowed absolute rise in error and fallback rates")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    options = {
+        key: value for key, value in vars(args).items()
+        if key not in ("scenarios", "save", "baseline", "tolerance", "rate_tolerance", "database_url")
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        groq_port, app_port = free_port(), free_port()
+        mock = start_mock(groq_port, args)
+        app = None
+        try:
+            groq_url, url = f"http://127.0.0.1:{groq_port}", f"http://127.0.0.1:{app_port}"
+            app = start_app(app_port, groq_port, directory, args)
+            asyncio.run(wait_until_ready(url, timeout=60))
+            results = asyncio.run(run_scenarios(url, groq_url, scenarios, args))
+        finally:
+            for process in (app, mock):
+                if process is not None:
+                    process.terminate()
+                    process.wait(timeout=60)
+
+    report = {"options": options, "scenarios": results}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("options") != options:
+            print("Warning: the baseline was run with different options", file=sys.stderr)
+        report["vs_baseline"], regressions = compare(results, baseline, args.tolerance, args.rate_tolerance)
+        report["regressions"] = regressions
+
+    print(json.dumps(report, indent=2))
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({"options": options, "scenarios": results}, f, indent=2)
+            f.write("\n")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
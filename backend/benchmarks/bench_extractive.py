@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the extractive fallback summarizer against the original
+first/middle/last-sentence fallback.
+
+Uses the .txt files in --corpus if given, otherwise a generated corpus of
+meeting-style notes at several sizes (1 KB to 50 KB).
+
+Usage:
+    python benchmarks/bench_extractive.py
+    python benchmarks/bench_extractive.py --corpus path/to/notes --repeat 50
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import extractive
+
+SUBJECTS = ["The team", "Finance", "The platform group", "Marketing", "Our largest customer", "The database migration",
+            "The search feature", "The mobile app", "Support", "The release train"]
+VERBS = ["agreed to", "is blocked on", "asked for", "delivered", "postponed", "reviewed", "estimated", "escalated"]
+OBJECTS = ["the quarterly roadmap", "a twelve percent budget increase", "the on-call rotation", "the API rate limits",
+           "the onboarding flow", "storage costs for backups", "the vendor contract", "the accessibility audit",
+           "latency on the summary endpoint", "the hiring plan for next quarter"]
+TAILS = ["before the end of the month", "with a follow-up next week", "pending legal review", "after the incident",
+         "as the top priority", "", "", "according to the latest numbers"]
+
+
+def naive_fallback(text: str):
+    """The original fallback: first, middle and last long sentence"""
+    sentences = text.split('.')
+    sentences = [s.strip() for s in sentences if s.strip()]
+    if len(sentences) <= 3:
+        return sentences
+    selected_sentences = [sentences[0]]
+    middle_idx = len(sentences) // 2
+    if middle_idx < len(sentences):
+        selected_sentences.append(sentences[middle_idx])
+    for i in range(len(sentences) - 1, 0, -1):
+        if sentences[i].strip() and len(sentences[i].strip()) > 15:
+            selected_sentences.append(sentences[i])
+            break
+    return selected_sentences
+
+
+def generate_note(size: int, rng: random.Random) -> str:
+    paragraphs, length = [], 0
+    while length < size:
+        paragraph = " ".join(
+            f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(TAILS)}".strip() + "."
+            for _ in range(rng.randint(3, 7))
+        )
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:size]
+
+
+def load_corpus(path: str):
+    if path:
+        return [(p.name, p.read_text(encoding="utf-8")) for p in sorted(Path(path).glob("*.txt"))]
+    rng = random.Random(42)
+    return [(f"generated-{size // 1000}kb", generate_note(size, rng)) for size in (1000, 5000, 20000, 50000)]
+
+
+def time_call(fn, text: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fallback summarizers")
+    parser.add_argument("--corpus", help="Directory of .txt notes")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    results = []
+    for name, text in load_corpus(args.corpus):
+        results.append({
+            "note": name,
+            "bytes": len(text.encode("utf-8")),
+            "sentences": len(extractive.split_sentences(text)),
+            "naive": time_call(naive_fallback, text, args.repeat),
+            "extractive": time_call(extractive.summarize, text, args.repeat),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the per-request cost of get_db
+Compares the old dependency (a SELECT version()/SELECT 1 probe before every
+request, on top of pool_pre_ping) with the current one (pre-ping only).
+Each simulated request opens a session, runs one primary-key lookup and closes.
+
+Point DATABASE_URL at the database you want to measure; PostgreSQL over a
+network shows the saved round trip most clearly.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_get_db.py --requests 2000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, SQLALCHEMY_DATABASE_URL, get_db
+
+
+def legacy_get_db():
+    """The previous dependency, minus its retry branch"""
+    db = SessionLocal()
+    try:
+        if SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
+            db.execute(text("SELECT version()"))
+        else:
+            db.execute(text("SELECT 1"))
+        yield db
+    finally:
+        db.close()
+
+
+def run(dependency, requests: int):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        generator = dependency()
+        db = next(generator)
+        db.execute(text("SELECT id FROM notes WHERE id = 1")).first()
+        generator.close()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "mean_us": round(sum(timings) / len(timings) * 1e6, 1),
+        "p50_us": round(timings[len(timings) // 2] * 1e6, 1),
+        "p99_us": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark get_db overhead")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Warm the pool so both variants start from the same state
+    run(get_db, 50)
+    legacy = run(legacy_get_db, args.requests)
+    current = run(get_db, args.requests)
+    print(json.dumps({
+        "requests": args.requests,
+        "legacy_probe": legacy,
+        "pre_ping_only": current,
+        "saved_per_request_us": round(legacy["mean_us"] - current["mean_us"], 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
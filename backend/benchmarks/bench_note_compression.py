@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Storage and I/O savings from compressed note text (SQLite)
+Builds two copies of the same notes table, one with plain original_text and
+one compressed the way the API stores it, VACUUMs both and reports:
+
+- database file size and compression ratio
+- time to scan every row (`SELECT *`, what a backup or export reads)
+- time to page through the notes list, which never reads original_text
+- time to fetch one full note, including decompression
+- per-note compress/decompress CPU cost
+
+Uses the .txt files in --corpus if given, otherwise generated meeting-style
+notes (see bench_extractive.py).
+
+Usage:
+    python benchmarks/bench_note_compression.py --notes 20000
+    NOTE_COMPRESSION=zstd python benchmarks/bench_note_compression.py --corpus path/to/notes
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import compression
+from bench_extractive import generate_note
+
+SCHEMA = """
+    CREATE TABLE notes (
+        id INTEGER PRIMARY KEY,
+        note_session_id VARCHAR(36) NOT NULL UNIQUE,
+        original_text TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        created_at DATETIME
+    )
+"""
+
+
+def load_texts(corpus: str, count: int):
+    if corpus:
+        texts = [p.read_text(encoding="utf-8") for p in sorted(Path(corpus).glob("*.txt"))]
+        return [texts[i % len(texts)] for i in range(count)]
+    rng = random.Random(42)
+    # Pasted notes: mostly a few KB, some much longer
+    return [generate_note(int(rng.lognormvariate(8.3, 0.8)), rng) for _ in range(count)]
+
+
+def build(path: str, texts, compress: bool):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.execute("CREATE INDEX ix_notes_created_at_id ON notes (created_at, id)")
+    rows = []
+    for i, text in enumerate(texts):
+        value = compression.compress_text(text) if compress else text
+        rows.append((i + 1, f"session-{i}", value, text[:300], "2025-01-01 00:00:00"))
+    conn.executemany("INSERT INTO notes VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return os.path.getsize(path)
+
+
+def timed(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return round(timings[len(timings) // 2], 3)
+
+
+def measure(path: str, count: int, repeat: int):
+    # No page cache carried between runs and no mmap, so scans hit the file
+    def scan():
+        conn = sqlite3.connect(path)
+        for row in conn.execute("SELECT * FROM notes"):
+            pass
+        conn.close()
+
+    def list_page():
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "SELECT id, note_session_id, substr(summary, 1, 200), created_at FROM notes ORDER BY created_at DESC, id DESC LIMIT 20"
+        ).fetchall()
+        conn.close()
+
+    conn = sqlite3.connect(path)
+    ids = [random.randint(1, count) for _ in range(200)]
+
+    def fetch_notes():
+        for note_id in ids:
+            value = conn.execute("SELECT original_text FROM notes WHERE id = ?", (note_id,)).fetchone()[0]
+            compression.decompress_text(value)
+
+    result = {
+        "full_scan_ms": timed(scan, repeat),
+        "list_page_ms": timed(list_page, repeat),
+        "fetch_note_ms": round(timed(fetch_notes, repeat) / len(ids), 4),
+    }
+    conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure compressed note storage")
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--corpus", help="Directory of .txt notes")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = load_texts(args.corpus, args.notes)
+    raw_bytes = sum(len(text.encode("utf-8")) for text in texts)
+
+    started = time.perf_counter()
+    stored = [compression.compress_text(text) for text in texts]
+    compress_us = (time.perf_counter() - started) / len(texts) * 1e6
+    started = time.perf_counter()
+    for value in stored:
+        compression.decompress_text(value)
+    decompress_us = (time.perf_counter() - started) / len(texts) * 1e6
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain_path = os.path.join(directory, "plain.db")
+        compressed_path = os.path.join(directory, "compressed.db")
+        plain_size = build(plain_path, texts, compress=False)
+        compressed_size = build(compressed_path, texts, compress=True)
+        plain = measure(plain_path, len(texts), args.repeat)
+        compressed = measure(compressed_path, len(texts), args.repeat)
+
+    print(json.dumps({
+        "notes": len(texts),
+        "format": compression.NOTE_COMPRESSION,
+        "level": compression.NOTE_COMPRESSION_LEVEL,
+        "text_bytes": raw_bytes,
+        "stored_text_bytes": sum(len(value) for value in stored),
+        "text_ratio": round(raw_bytes / sum(len(value) for value in stored), 2),
+        "compress_us_per_note": round(compress_us, 1),
+        "decompress_us_per_note": round(decompress_us, 1),
+        "plain": {"file_bytes": plain_size, **plain},
+        "compressed": {"file_bytes": compressed_size, **compressed},
+        "file_size_saved": f"{(1 - compressed_size / plain_size) * 100:.1f}%",
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the notes endpoints
+Seeds notes through POST /notes, then drives a read-heavy mix
+(GET /notes/{id}, GET /notes, some PUTs) from many parallel clients against
+a running server. Run it against the sync-handler build and the async build
+with the same worker count to compare.
+
+Usage:
+    python benchmarks/bench_notes_load.py --url http://localhost:8000 --clients 500 --requests 10000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import httpx
+
+from load_summarize import percentile
+
+
+async def seed(client: httpx.AsyncClient, count: int):
+    session_ids = []
+    for i in range(count):
+        note_session_id = str(uuid.uuid4())
+        response = await client.post("/notes", json={
+            "note_session_id": note_session_id,
+            "original_text": f"Benchmark note {i}. " * 50,
+            "summary": f"Summary of benchmark note {i}."
+        })
+        response.raise_for_status()
+        session_ids.append(note_session_id)
+    return session_ids
+
+
+async def run_load(url: str, clients: int, total: int, seed_count: int, write_ratio: float):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        session_ids = await seed(client, seed_count)
+        latencies = {"get_note": [], "list_notes": [], "update_note": []}
+        errors = 0
+        remaining = total
+        rng = random.Random(7)
+
+        async def worker():
+            nonlocal errors, remaining
+            while remaining > 0:
+                remaining -= 1
+                roll = rng.random()
+                note_session_id = rng.choice(session_ids)
+                start = time.perf_counter()
+                try:
+                    if roll < write_ratio:
+                        kind = "update_note"
+                        response = await client.put(f"/notes/{note_session_id}", json={"summary": f"Updated {time.time()}"})
+                    elif roll < 0.8:
+                        kind = "get_note"
+                        response = await client.get(f"/notes/{note_session_id}")
+                    else:
+                        kind = "list_notes"
+                        response = await client.get("/notes", params={"limit": 20})
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies[kind].append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    report = {
+        "clients": clients,
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+    }
+    for kind, values in latencies.items():
+        report[kind] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the notes endpoints")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--seed-notes", type=int, default=200)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(args.url, args.clients, args.requests, args.seed_notes, args.write_ratio))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
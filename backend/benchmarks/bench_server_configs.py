@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Compare process-model configurations on one machine
+Starts the API under each configuration on a fresh SQLite file, drives the
+same mixed insert/update/read load as bench_sqlite_mixed.py and reports
+throughput, latency percentiles, time until the server answers and the
+memory of the whole process tree (proportional set size, so pages shared
+copy-on-write between the gunicorn master and its workers are counted
+once). Configurations:
+
+- uvicorn: `uvicorn --workers N`, as run.py starts it; every worker imports the app
+- gunicorn: gunicorn_conf.py with preload and recycling off
+- gunicorn_preload: the app imported once in the master, workers forked from it
+- gunicorn_recycle: preload plus workers recycled every --max-requests requests
+
+Memory figures need Linux (/proc).
+
+Usage:
+    python benchmarks/bench_server_configs.py --workers 4 --clients 200 --requests 5000
+    python benchmarks/bench_server_configs.py --configs uvicorn,gunicorn_preload --workers 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_sqlite_mixed import run_mix, wait_until_ready
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = ("uvicorn", "gunicorn", "gunicorn_preload", "gunicorn_recycle")
+
+
+def start_server(config: str, port: int, workers: int, max_requests: int, directory: str):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(directory, 'notes.db')}",
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(directory, "metrics"),
+        "DEBUG": "False",
+        "LOG_LEVEL": "WARNING",
+        "PORT": str(port),
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_PRELOAD": str(config != "gunicorn"),
+        "GUNICORN_MAX_REQUESTS": str(max_requests if config == "gunicorn_recycle" else 0),
+    })
+    os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+    # Create the schema once before workers race to do it
+    subprocess.run([sys.executable, "-c", "from app.database import init_db; init_db()"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    if config == "uvicorn":
+        command = [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn_conf.py", "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+def process_tree(pid: int):
+    """pid and all of its descendants"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields after it are fixed
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def tree_memory_mb(pid: int):
+    """Summed PSS of the process tree in MB, or None without /proc"""
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        return None
+    total_kb = 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1)
+
+
+def run_config(config: str, args):
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        server = start_server(config, args.port, args.workers, args.max_requests, directory)
+        try:
+            url = f"http://127.0.0.1:{args.port}"
+            asyncio.run(wait_until_ready(url, timeout=60))
+            ready_s = time.perf_counter() - started
+            time.sleep(1)  # Let every worker finish its lifespan startup
+            idle_mb = tree_memory_mb(server.pid)
+            load = asyncio.run(run_mix(url, args.clients, args.requests, args.insert_ratio, args.update_ratio))
+            return {
+                "ready_s": round(ready_s, 2),
+                "memory_idle_mb": idle_mb,
+                "memory_after_load_mb": tree_memory_mb(server.pid),
+                **load,
+            }
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare uvicorn and gunicorn process models under the same load")
+    parser.add_argument("--configs", default=",".join(CONFIGS), help=f"Comma-separated subset of {', '.join(CONFIGS)}")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-requests", type=int, default=500, help="Recycling interval for gunicorn_recycle")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--insert-ratio", type=float, default=0.3)
+    parser.add_argument("--update-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    configs = [name.strip() for name in args.configs.split(",") if name.strip()]
+    unknown = set(configs) - set(CONFIGS)
+    if unknown:
+        parser.error(f"Unknown configs: {', '.join(sorted(unknown))}")
+
+    result = {"workers": args.workers, "clients": args.clients, "requests": args.requests}
+    for config in configs:
+        result[config] = run_config(config, args)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Mixed read/write load test for SQLite performance mode
+Starts the API twice on a fresh SQLite file (multiple uvicorn workers, like
+run.py): once with SQLITE_PERFORMANCE_MODE=False (rollback journal, a
+connection pool that writes directly) and once with it on (WAL, pragmas,
+single group-committing writer). Each run drives the same mix of
+POST /notes inserts, PUT /notes updates and GET reads, then reports
+throughput, latency percentiles and errors such as "database is locked".
+
+Usage:
+    python benchmarks/bench_sqlite_mixed.py --workers 4 --clients 200 --requests 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from load_summarize import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(port: int, workers: int, database_path: str, performance_mode: bool):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "SQLITE_PERFORMANCE_MODE": str(performance_mode),
+        "DEBUG": "False",
+    })
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    # Create the schema once before workers race to do it
+    subprocess.run([sys.executable, "-c", "from app.database import init_db; init_db()"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_until_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=2) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {timeout:.0f}s")
+
+
+async def run_mix(url: str, clients: int, total: int, insert_ratio: float, update_ratio: float):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        # A few rows so reads and updates have something to hit from the start
+        session_ids = []
+        for i in range(20):
+            note_session_id = str(uuid.uuid4())
+            response = await client.post("/notes", json={
+                "note_session_id": note_session_id,
+                "original_text": f"Seed note {i}. " * 50,
+                "summary": f"Summary of seed note {i}."
+            })
+            response.raise_for_status()
+            session_ids.append(note_session_id)
+
+        latencies = {"insert": [], "update": [], "read": []}
+        errors = {}
+        remaining = total
+        rng = random.Random(13)
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                roll = rng.random()
+                start = time.perf_counter()
+                try:
+                    if roll < insert_ratio:
+                        kind = "insert"
+                        note_session_id = str(uuid.uuid4())
+                        response = await client.post("/notes", json={
+                            "note_session_id": note_session_id,
+                            "original_text": "Load test note. " * 50,
+                            "summary": "Load test summary."
+                        })
+                        if response.status_code == 200:
+                            session_ids.append(note_session_id)
+                    elif roll < insert_ratio + update_ratio:
+                        kind = "update"
+                        response = await client.put(f"/notes/{rng.choice(session_ids)}", json={"summary": f"Updated {time.time()}"})
+                    else:
+                        kind = "read"
+                        if rng.random() < 0.7:
+                            response = await client.get(f"/notes/{rng.choice(session_ids)}")
+                        else:
+                            response = await client.get("/notes", params={"limit": 20})
+                    if response.status_code >= 400:
+                        key = f"{kind}_{response.status_code}"
+                        errors[key] = errors.get(key, 0) + 1
+                        continue
+                except httpx.HTTPError as e:
+                    key = type(e).__name__
+                    errors[key] = errors.get(key, 0) + 1
+                    continue
+                latencies[kind].append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    succeeded = sum(len(values) for values in latencies.values())
+    report = {
+        "elapsed_s": round(elapsed, 3),
+        "successful_rps": round(succeeded / elapsed, 2) if elapsed else 0.0,
+        "writes_per_s": round((len(latencies["insert"]) + len(latencies["update"])) / elapsed, 2) if elapsed else 0.0,
+        "errors": errors,
+    }
+    for kind, values in latencies.items():
+        report[kind] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+        }
+    return report
+
+
+def run_mode(performance_mode: bool, args):
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "notes.db")
+        server = start_server(args.port, args.workers, database_path, performance_mode)
+        try:
+            url = f"http://127.0.0.1:{args.port}"
+            asyncio.run(wait_until_ready(url))
+            return asyncio.run(run_mix(url, args.clients, args.requests, args.insert_ratio, args.update_ratio))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQLite default and performance modes under mixed load")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--insert-ratio", type=float, default=0.3)
+    parser.add_argument("--update-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    baseline = run_mode(False, args)
+    tuned = run_mode(True, args)
+    result = {
+        "workers": args.workers,
+        "clients": args.clients,
+        "requests": args.requests,
+        "baseline": baseline,
+        "performance_mode": tuned,
+        "throughput_gain": round(tuned["successful_rps"] / baseline["successful_rps"], 2) if baseline["successful_rps"] else None,
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
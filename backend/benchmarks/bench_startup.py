@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+Measures, in fresh interpreters, how long `import app.main` takes (with a
+`-X importtime` breakdown by top-level package) and how long a uvicorn
+worker takes from spawn to its first successful /health/live response.
+
+Results can be saved and compared against a stored baseline, e.g. the one
+tracked in benchmarks/results/startup.json:
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --save benchmarks/results/startup.json
+    python benchmarks/bench_startup.py --baseline benchmarks/results/startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def bench_env(database_path: str):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "DEBUG": "False",
+        "LOG_LEVEL": "WARNING",
+    })
+    return env
+
+
+def import_breakdown(env):
+    """One `-X importtime` run: total microseconds and self time per top-level package"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    total, packages = 0, defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = int(match[1]), int(match[2]), match[3], match[4]
+        packages[module.split(".")[0]] += self_us
+        if module == "app.main":
+            total = cumulative_us
+    return total, packages
+
+
+def time_to_first_response(env, timeout: float = 30.0) -> float:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/live", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"Server did not answer within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and cold start of the API")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="Packages to list in the breakdown")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved earlier with --save")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = bench_env(os.path.join(directory, "startup.db"))
+        imports, startups, packages = [], [], defaultdict(list)
+        for _ in range(args.runs):
+            total, breakdown = import_breakdown(env)
+            imports.append(total / 1e6)
+            for package, self_us in breakdown.items():
+                packages[package].append(self_us / 1e6)
+            startups.append(time_to_first_response(env))
+
+    top = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)[:args.top]
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "import_seconds": round(statistics.median(imports), 3),
+        "first_response_seconds": round(statistics.median(startups), 3),
+        "import_self_seconds_by_package": {package: round(statistics.median(values), 4) for package, values in top},
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        results["vs_baseline"] = {
+            key: f"{(results[key] / baseline[key] - 1) * 100:+.1f}%"
+            for key in ("import_seconds", "first_response_seconds")
+            if baseline.get(key)
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
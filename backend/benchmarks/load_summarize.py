@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the /summarize endpoint
+Fires concurrent requests at a running server and reports requests per second
+and latency percentiles. Run it once against the old sync build and once
+against the current build (same machine, same GROQ settings) to compare.
+
+Usage:
+    python benchmarks/load_summarize.py --url http://localhost:8000 --concurrency 50 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+SAMPLE_TEXT = (
+    "The quarterly planning meeting covered the roadmap for the next release. "
+    "The team agreed to prioritise the search feature and postpone the mobile redesign. "
+    "Infrastructure costs rose by twelve percent, mostly due to database storage. "
+    "Action items were assigned to each squad lead with a review in two weeks."
+)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_load(url: str, concurrency: int, total: int, text: str):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/summarize", json={"text": text})
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test POST /summarize")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--text-file", help="Use the contents of this file as the note text")
+    args = parser.parse_args()
+
+    text = SAMPLE_TEXT
+    if args.text_file:
+        with open(args.text_file, encoding="utf-8") as f:
+            text = f.read()
+
+    result = asyncio.run(run_load(args.url, args.concurrency, args.requests, text))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
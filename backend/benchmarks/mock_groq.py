@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Groq chat completions API
+Answers POST /openai/v1/chat/completions (plain and streaming) the way
+Groq does, so the app can be benchmarked without a network or an API key.
+Point the app at it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+- latency: each call takes --latency seconds at the median, spread
+  log-normally by --jitter (0 = constant), so there is a realistic tail
+- rate limits: --rpm and --tpm per-minute buckets; over them the call is
+  answered 429 with Groq's retry-after and x-ratelimit-* headers
+- errors: --error-rate of calls fail with --error-status after the latency
+
+GET /stats returns call counts since start.
+
+Usage:
+    python benchmarks/mock_groq.py --port 9999 --latency 0.8 --jitter 0.4
+    python benchmarks/mock_groq.py --port 9999 --rpm 300 --tpm 60000 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_WORD = re.compile(r"\w+")
+
+
+class MinuteBucket:
+    """Token bucket refilled continuously at `limit` per minute; limit 0 = unlimited"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.available = float(limit)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.limit, self.available + (now - self.updated) * self.limit / 60)
+        self.updated = now
+
+    def wait_for(self, amount: int) -> float:
+        """Seconds until `amount` is available"""
+        if not self.limit:
+            return 0.0
+        self._refill()
+        return max(0.0, (amount - self.available) * 60 / self.limit)
+
+    def take(self, amount: int):
+        if self.limit:
+            self.available -= amount
+
+    def headers(self, kind: str):
+        if not self.limit:
+            return {}
+        self._refill()
+        return {
+            f"x-ratelimit-limit-{kind}": str(self.limit),
+            f"x-ratelimit-remaining-{kind}": str(int(self.available)),
+            f"x-ratelimit-reset-{kind}": f"{(self.limit - self.available) * 60 / self.limit:.2f}s",
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def create_app(args) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(args.seed)
+    requests = MinuteBucket(args.rpm)
+    tokens = MinuteBucket(args.tpm)
+    stats = {"calls": 0, "ok": 0, "streams": 0, "rate_limited": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def delay() -> float:
+        return args.latency * rng.lognormvariate(0, args.jitter) if args.jitter else args.latency
+
+    def rate_limit_headers():
+        return {**requests.headers("requests"), **tokens.headers("tokens")}
+
+    def completion_text(prompt: str, max_tokens: int) -> str:
+        # Words from the prompt, so summaries differ per note but cost nothing to make
+        words = _WORD.findall(prompt)[-400:] or ["summary"]
+        count = min(max_tokens, args.completion_tokens)
+        return " ".join(words[i % len(words)] for i in range(count))
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["calls"] += 1
+        prompt = "\n".join(message.get("content") or "" for message in body.get("messages", []))
+        prompt_tokens = estimate_tokens(prompt)
+        max_tokens = body.get("max_tokens") or 1024
+
+        reserved_tokens = prompt_tokens + min(max_tokens, args.completion_tokens)
+        waits = {"requests": requests.wait_for(1), "tokens": tokens.wait_for(reserved_tokens)}
+        limited_by = max(waits, key=waits.get)
+        if waits[limited_by]:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": f"Rate limit reached for {limited_by}. Please try again later.", "type": limited_by, "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after": str(max(1, round(waits[limited_by]))), **rate_limit_headers()},
+            )
+        requests.take(1)
+        tokens.take(reserved_tokens)
+
+        await asyncio.sleep(delay())
+        if args.error_rate and rng.random() < args.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Injected upstream error", "type": "internal_server_error"}},
+                status_code=args.error_status,
+            )
+
+        text = completion_text(prompt, max_tokens)
+        completion_tokens = len(text.split())
+        stats["ok"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+        if body.get("stream"):
+            stats["streams"] += 1
+
+            async def events():
+                words = text.split(" ")
+                for i in range(0, len(words), 8):
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": body["model"],
+                        "choices": [{"index": 0, "delta": {"content": " ".join(words[i:i + 8]) + " "}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(args.stream_interval)
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": body["model"],
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "x_groq": {"usage": usage},
+                }
+                yield f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream", headers=rate_limit_headers())
+
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        }, headers=rate_limit_headers())
+
+    return app
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Mock Groq chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--latency", type=float, default=0.5, help="Median seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Log-normal sigma of the latency; 0 = constant")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s; 0 = unlimited")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per minute before 429s; 0 = unlimited")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--completion-tokens", type=int, default=120, help="Length of each completion")
+    parser.add_argument("--stream-interval", type=float, default=0.02, help="Seconds between streamed chunks")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Gunicorn settings for production: uvicorn workers under a gunicorn master.
+
+    python migrate.py && gunicorn app.main:app -c gunicorn_conf.py
+
+or `SERVER=gunicorn python run.py`, which also runs the migrations first. The
+app is imported once in the master and the workers are forked from it,
+so they share its memory pages until they write to them. Workers are
+recycled after a jittered number of requests to bound memory growth, and
+on shutdown each one stops accepting, finishes its in-flight requests
+and runs the app's shutdown before gunicorn's graceful timeout expires.
+"""
+
+import gc
+import os
+
+from dotenv import load_dotenv
+
+# Before app modules read their settings
+load_dotenv()
+
+from app import server
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
+
+GUNICORN_PRELOAD = os.getenv("GUNICORN_PRELOAD", "True").lower() in ("true", "1", "t")
+GUNICORN_MAX_REQUESTS = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))  # 0 never recycles
+GUNICORN_MAX_REQUESTS_JITTER = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(GUNICORN_MAX_REQUESTS // 10)))
+GUNICORN_GRACEFUL_TIMEOUT = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))  # Seconds from SIGTERM to SIGKILL
+GUNICORN_TIMEOUT = int(os.getenv("GUNICORN_TIMEOUT", "60"))  # Restart a worker whose event loop stops responding
+GUNICORN_KEEPALIVE = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Must happen before the app (and app.metrics) is imported, which with
+# preload_app is before any gunicorn hook runs
+server.prepare_metrics_dir()
+
+bind = f"{HOST}:{PORT}"
+workers = 1 if DEBUG else server.worker_count()
+worker_class = "app.gunicorn_worker.DrainingUvicornWorker"
+preload_app = GUNICORN_PRELOAD
+max_requests = GUNICORN_MAX_REQUESTS
+max_requests_jitter = GUNICORN_MAX_REQUESTS_JITTER
+graceful_timeout = GUNICORN_GRACEFUL_TIMEOUT
+timeout = GUNICORN_TIMEOUT
+keepalive = GUNICORN_KEEPALIVE
+loglevel = "debug" if DEBUG else "info"
+accesslog = "-" if DEBUG else None
+
+
+def when_ready(arbiter):
+    arbiter.log.info(
+        f"Starting {arbiter.num_workers} workers ({server.cpu_count()} CPUs, io ratio {server.WORKER_IO_RATIO}, "
+        f"preload {preload_app}, max requests {max_requests}+{max_requests_jitter})"
+    )
+
+
+def pre_fork(arbiter, worker):
+    if preload_app:
+        # Move the preloaded objects out of the collector's reach so the
+        # child's first collections don't touch (and copy) shared pages
+        gc.freeze()
+
+
+def child_exit(arbiter, worker):
+    from app import metrics
+
+    metrics.mark_process_dead(worker.pid)
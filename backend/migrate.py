@@ -1,42 +1,62 @@
 #!/usr/bin/env python3
 """
 Database migration script for production deployment
-This script ensures database tables are created before starting the server
+This script applies the versioned migrations in migrations/ before the
+server starts: new tables, then batched, resumable changes to existing ones.
+
+    python migrate.py                 # apply everything pending
+    python migrate.py --status        # list applied and pending migrations
+    python migrate.py --target 0003   # stop after a version
+    python migrate.py --rebuild-search-index   # after writing notes outside the app
 """
 
-import os
+import argparse
+import logging
 import sys
 from pathlib import Path
 
 # Add the current directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
-def create_tables():
-    """Create database tables if they don't exist"""
+def create_tables(target=None, batch_size=None):
+    """Apply pending versioned migrations from migrations/"""
     try:
-        from app.database import engine, Base
-        import os
-        
-        database_url = os.getenv("DATABASE_URL", "sqlite:///./notes.db")
-        if database_url.startswith("postgres://"):
-            database_url = database_url.replace("postgres://", "postgresql://", 1)
+        from app import migrator
+        from app.database import engine
         
-        db_type = "PostgreSQL" if database_url.startswith("postgresql://") else "SQLite"
-        print(f"Creating tables for {db_type} database...")
+        db_type = "PostgreSQL" if engine.dialect.name == "postgresql" else "SQLite"
+        print(f"Migrating {db_type} database...")
         
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created successfully!")
+        applied = migrator.upgrade(engine, target=target, batch_size=batch_size or migrator.MIGRATION_BATCH_SIZE)
+        if applied:
+            print(f"✅ Applied migrations {', '.join(applied)}")
+        else:
+            print("✅ Database schema is up to date")
         return True
     except Exception as e:
-        print(f"❌ Error creating database tables: {e}")
+        print(f"❌ Error migrating database: {e}")
         if "does not exist" in str(e):
             print("💡 Ensure the PostgreSQL database exists and is accessible")
         elif "permission denied" in str(e):
             print("💡 Check database user permissions")
         elif "connection" in str(e).lower():
             print("💡 Verify database connection string and network access")
+        print("💡 Rerun to resume: finished batches are kept")
         return False
 
+def print_status():
+    """List migrations, when they were applied and any backfill in progress"""
+    from app import migrator
+    from app.database import engine
+    
+    for migration in migrator.status(engine):
+        applied_at = migration["applied_at"]
+        state = f"applied {applied_at:%Y-%m-%d %H:%M:%S}" if applied_at else "pending"
+        print(f"{migration['version']} {migration['name']:<28} {state}  {migration['description']}")
+        for checkpoint in migration["checkpoints"]:
+            position = "finished" if checkpoint["last_id"] is None else f"up to id {checkpoint['last_id']}"
+            print(f"     {checkpoint['step']}: {checkpoint['rows_done']} rows, {position}")
+
 def test_database_connection():
     """Test database connection"""
     try:
@@ -46,8 +66,18 @@ def test_database_connection():
         print(f"Database connection failed: {e}")
         return False
 
-def main():
+def main(argv=None):
     """Main migration function"""
+    parser = argparse.ArgumentParser(description="Apply versioned database migrations")
+    parser.add_argument("--status", action="store_true", help="List migrations and exit")
+    parser.add_argument("--target", help="Stop after this version, e.g. 0003")
+    parser.add_argument("--batch-size", type=int, help="Rows per backfill transaction (default MIGRATION_BATCH_SIZE)")
+    parser.add_argument("--rebuild-search-index", action="store_true",
+                        help="Re-index every note afterwards, e.g. after writing to notes outside the app (SQLite)")
+    args = parser.parse_args(argv)
+    
+    # Migration progress is logged by app.migrator
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("Starting database setup...")
     
     # Test connection
@@ -55,11 +85,21 @@ def main():
         print("Failed to connect to database. Exiting.")
         sys.exit(1)
     
-    # Create tables
-    if not create_tables():
+    if args.status:
+        print_status()
+        return
+    
+    # Create and upgrade tables
+    if not create_tables(args.target, args.batch_size):
         print("Failed to create database tables. Exiting.")
         sys.exit(1)
     
+    if args.rebuild_search_index:
+        from app import search
+        from app.database import engine
+        search.rebuild_search_index(engine)
+        print("✅ Search index rebuilt")
+    
     print("Database setup completed successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,9 @@
+"""Create the tables the models define"""
+
+from app.database import Base
+
+
+def upgrade(ctx):
+    # Builds the whole current schema on a new database. Tables that already
+    # exist are left as they are; the scripts after this one bring them up to date.
+    Base.metadata.create_all(bind=ctx.engine)
@@ -0,0 +1,24 @@
+"""Add notes.note_session_id and notes.updated_at to tables created before them"""
+
+import uuid
+
+
+def upgrade(ctx):
+    ctx.add_column("notes", "note_session_id", "VARCHAR(36)")
+    # Each row needs its own UUID, so they're generated here and written with one executemany per batch
+    ctx.backfill(
+        "note_session_id",
+        "SELECT id FROM notes WHERE id > :after AND note_session_id IS NULL ORDER BY id LIMIT :limit",
+        "UPDATE notes SET note_session_id = :note_session_id WHERE id = :id",
+        transform=lambda row: {"id": row.id, "note_session_id": str(uuid.uuid4())},
+    )
+    # Databases upgraded by the old migrate_db.py have this index under another name
+    if "idx_note_session_id" not in ctx.indexes("notes"):
+        ctx.create_index("ix_notes_note_session_id", "notes", "(note_session_id)", unique=True)
+
+    ctx.add_column("notes", "updated_at", "TIMESTAMP")
+    ctx.backfill(
+        "updated_at",
+        "SELECT id FROM notes WHERE id > :after AND updated_at IS NULL ORDER BY id LIMIT :limit",
+        "UPDATE notes SET updated_at = created_at WHERE id BETWEEN :first AND :last AND updated_at IS NULL",
+    )
@@ -0,0 +1,6 @@
+"""Add notes.version for optimistic concurrency"""
+
+
+def upgrade(ctx):
+    # A constant default fills existing rows without rewriting the table
+    ctx.add_column("notes", "version", "INTEGER NOT NULL DEFAULT 1")
@@ -0,0 +1,5 @@
+"""Index notes on (created_at, id) for keyset pagination of GET /notes"""
+
+
+def upgrade(ctx):
+    ctx.create_index("ix_notes_created_at_id", "notes", "(created_at, id)")
@@ -0,0 +1,22 @@
+"""Build the full-text search index: GIN on PostgreSQL, FTS5 on SQLite"""
+
+import logging
+
+from sqlalchemy.exc import OperationalError
+
+from app import search
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade(ctx):
+    if ctx.is_postgresql:
+        ctx.create_index("ix_notes_fts", "notes", f"USING GIN (({search.PG_DOCUMENT}))")
+        return
+    # SQLite has one writer at a time, so an online build buys nothing there:
+    # the FTS table, its triggers and the initial rebuild go in one transaction
+    try:
+        search.create_search_index(ctx.engine)
+    except OperationalError as e:
+        # Search is optional; e.g. SQLite built without FTS5
+        logger.warning(f"Full-text search index unavailable: {e}")
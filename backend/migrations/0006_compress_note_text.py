@@ -0,0 +1,19 @@
+"""Rewrite plain-text notes.original_text values in compressed form (SQLite only; no-op on PostgreSQL)"""
+
+from app import compression
+
+
+def upgrade(ctx):
+    # PostgreSQL keeps the column as plain text (TOAST compresses it)
+    if ctx.is_postgresql or compression.NOTE_COMPRESSION == "none":
+        return
+    ctx.backfill(
+        "original_text",
+        """
+            SELECT id, original_text FROM notes
+            WHERE id > :after AND typeof(original_text) = 'text'
+            ORDER BY id LIMIT :limit
+        """,
+        "UPDATE notes SET original_text = :value WHERE id = :id",
+        transform=lambda row: {"id": row.id, "value": compression.compress_text(row.original_text)},
+    )
@@ -0,0 +1,13 @@
+"""Drop the SQLite search triggers; note writes in the app keep the index in sync"""
+
+from app import search
+
+
+def upgrade(ctx):
+    # The triggers called note_text(), which only the app's connections
+    # have, so any other tool writing to notes failed. The index content is
+    # unchanged, so it needs no rebuild.
+    if ctx.is_postgresql:
+        return
+    for name in search.SQLITE_LEGACY_TRIGGERS:
+        ctx.execute(f"DROP TRIGGER IF EXISTS {name}")
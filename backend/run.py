@@ -1,39 +1,63 @@
 import uvicorn
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+from app.server import prepare_metrics_dir, worker_count
+
 # Get server configuration from environment variables
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8000"))
 DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
+SERVER = os.getenv("SERVER", "uvicorn").lower()  # uvicorn, or gunicorn for preloaded, recycled workers (see gunicorn_conf.py)
 
 def run_migrations():
     """Run database migrations before starting the server"""
     try:
         from migrate import main as run_migrate
-        run_migrate()
+        run_migrate([])
         return True
     except Exception as e:
         print(f"Migration error: {e}")
         return False
 
+def run_gunicorn():
+    """Run gunicorn in this process with gunicorn_conf.py, as `gunicorn -c gunicorn_conf.py app.main:app` would"""
+    from gunicorn.app.wsgiapp import WSGIApplication
+    from app.database import engine
+
+    # The migrations left pooled connections in this process; workers forked from it must not share them
+    engine.dispose()
+    sys.argv = ["gunicorn", "-c", os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn_conf.py"), "app.main:app"]
+    WSGIApplication("%(prog)s [OPTIONS] [APP_MODULE]").run()
+
 if __name__ == "__main__":
+    # Before anything imports app.metrics (the migrations do, through
+    # app.database): prometheus_client picks single- or multiprocess mode
+    # at import, and preloaded gunicorn workers inherit that choice
+    prepare_metrics_dir()
+    
     # Run migrations first
     print("Running database migrations...")
     if not run_migrations():
         print("Failed to run migrations. Exiting.")
         exit(1)
     
+    if SERVER == "gunicorn" and not DEBUG:
+        print(f"Starting gunicorn on {HOST}:{PORT}")
+        run_gunicorn()
+        exit(0)
+    
     print(f"Starting server on {HOST}:{PORT} (Debug: {DEBUG})")
     uvicorn.run(
         "app.main:app", 
         host=HOST, 
         port=PORT, 
         reload=DEBUG,
-        workers=1 if DEBUG else 4,
+        workers=1 if DEBUG else worker_count(),
         access_log=DEBUG,
         log_level="debug" if DEBUG else "info"
     )
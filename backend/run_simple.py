@@ -5,6 +5,8 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+from app.server import worker_count
+
 # Get server configuration from environment variables
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8000"))  # Use port 8000 for production
@@ -17,7 +19,7 @@ if __name__ == "__main__":
         host=HOST, 
         port=PORT, 
         reload=DEBUG,
-        workers=1 if DEBUG else 4,  # Use multiple workers for production
+        workers=1 if DEBUG else worker_count(),  # Use multiple workers for production
         access_log=DEBUG,
         log_level="debug" if DEBUG else "info"
     )